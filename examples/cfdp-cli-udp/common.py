@@ -1,15 +1,13 @@
 from __future__ import annotations  # Python 3.9 compatibility for | syntax
 
-import copy
 import json
 import logging
-import select
 import socket
 import threading
-import time
+from dataclasses import dataclass, replace
 from datetime import timedelta
 from pathlib import Path
-from queue import Empty
+from queue import Empty, Queue, SimpleQueue
 from threading import Thread
 from typing import TYPE_CHECKING, Any
 
@@ -19,7 +17,8 @@ from spacepackets.cfdp import (
     TransactionId,
     TransmissionMode,
 )
-from spacepackets.cfdp.pdu import AbstractFileDirectiveBase, PduFactory, PduHolder
+from spacepackets.cfdp.pdu import AbstractFileDirectiveBase, DirectiveType, PduFactory
+from spacepackets.cfdp.pdu.header import AbstractPduBase
 from spacepackets.cfdp.tlv import (
     MessageToUserTlv,
     OriginatingTransactionId,
@@ -31,7 +30,7 @@ from spacepackets.cfdp.tlv import (
 from spacepackets.countdown import Countdown
 from spacepackets.util import ByteFieldU16, UnsignedByteField
 
-from cfdppy import CfdpState, PacketDestination, PutRequest, get_packet_destination
+from cfdppy import CfdpState, PacketDestination, PutRequest
 from cfdppy.exceptions import InvalidDestinationId, SourceFileDoesNotExist
 from cfdppy.mib import (
     CheckTimerProvider,
@@ -49,7 +48,7 @@ from cfdppy.user import (
 )
 
 if TYPE_CHECKING:
-    from multiprocessing import Queue
+    from collections.abc import Callable
 
     from cfdppy.handler import DestHandler, SourceHandler
 
@@ -63,6 +62,8 @@ INDICATION_CFG = IndicationCfg()
 FILE_CONTENT = "Hello World!\n"
 FILE_SEGMENT_SIZE = 256
 MAX_PACKET_LEN = 512
+# The check timer interval is constant, so only the countdown needs to be created for each timer.
+CHECK_TIMER_INTERVAL = timedelta(seconds=5.0)
 
 REMOTE_CFG_OF_LOCAL_ENTITY = RemoteEntityCfg(
     entity_id=LOCAL_ENTITY_ID,
@@ -74,13 +75,43 @@ REMOTE_CFG_OF_LOCAL_ENTITY = RemoteEntityCfg(
     crc_type=ChecksumType.CRC_32,
 )
 
-REMOTE_CFG_OF_REMOTE_ENTITY = copy.copy(REMOTE_CFG_OF_LOCAL_ENTITY)
-REMOTE_CFG_OF_REMOTE_ENTITY.entity_id = REMOTE_ENTITY_ID
+# Same configuration, only the entity ID is different.
+REMOTE_CFG_OF_REMOTE_ENTITY = replace(REMOTE_CFG_OF_LOCAL_ENTITY, entity_id=REMOTE_ENTITY_ID)
 
 LOCAL_PORT = 5111
 REMOTE_PORT = 5222
 
 
+def get_packet_destination_from_raw(data: bytes | bytearray) -> PacketDestination:
+    """Variant of :py:func:`cfdppy.get_packet_destination` which only inspects the PDU header and
+    the directive codes of the raw PDU instead of requiring a fully parsed PDU."""
+    directive_type = PduFactory.pdu_directive_type(data)
+    if directive_type is None or directive_type in [
+        DirectiveType.METADATA_PDU,
+        DirectiveType.EOF_PDU,
+        DirectiveType.PROMPT_PDU,
+    ]:
+        return PacketDestination.DEST_HANDLER
+    if directive_type in [
+        DirectiveType.FINISHED_PDU,
+        DirectiveType.NAK_PDU,
+        DirectiveType.KEEP_ALIVE_PDU,
+    ]:
+        return PacketDestination.SOURCE_HANDLER
+    if directive_type == DirectiveType.ACK_PDU:
+        # The directive code of the acknowledged PDU follows the directive code of the ACK PDU.
+        acked_directive = data[AbstractPduBase.header_len_from_raw(data) + 1] >> 4
+        if acked_directive == DirectiveType.EOF_PDU:
+            return PacketDestination.SOURCE_HANDLER
+        if acked_directive == DirectiveType.FINISHED_PDU:
+            return PacketDestination.DEST_HANDLER
+    raise ValueError(f"unexpected directive type {directive_type}")
+
+
+def _transaction_key(transaction_id: TransactionId) -> tuple[int, int]:
+    return transaction_id.source_id.value, transaction_id.seq_num.value
+
+
 class CfdpFaultHandler(DefaultFaultHandlerBase):
     def __init__(self, base_str: str):
         self.base_str = base_str
@@ -90,40 +121,63 @@ class CfdpFaultHandler(DefaultFaultHandlerBase):
         self, transaction_id: TransactionId, cond: ConditionCode, progress: int
     ) -> None:
         _LOGGER.warning(
-            f"{self.base_str}: Received Notice of Suspension for transaction {transaction_id!r} "
-            f"with condition code {cond!r}. Progress: {progress}"
+            "%s: Received Notice of Suspension for transaction %r with condition code %r. "
+            "Progress: %d",
+            self.base_str,
+            transaction_id,
+            cond,
+            progress,
         )
 
     def notice_of_cancellation_cb(
         self, transaction_id: TransactionId, cond: ConditionCode, progress: int
     ) -> None:
         _LOGGER.warning(
-            f"{self.base_str}: Received Notice of Cancellation for transaction {transaction_id!r} "
-            f"with condition code {cond!r}. Progress: {progress}"
+            "%s: Received Notice of Cancellation for transaction %r with condition code %r. "
+            "Progress: %d",
+            self.base_str,
+            transaction_id,
+            cond,
+            progress,
         )
 
     def abandoned_cb(
         self, transaction_id: TransactionId, cond: ConditionCode, progress: int
     ) -> None:
         _LOGGER.warning(
-            f"{self.base_str}: Abandoned fault for transaction {transaction_id!r} "
-            f"with condition code {cond!r}. Progress: {progress}"
+            "%s: Abandoned fault for transaction %r with condition code %r. Progress: %d",
+            self.base_str,
+            transaction_id,
+            cond,
+            progress,
         )
 
     def ignore_cb(self, transaction_id: TransactionId, cond: ConditionCode, progress: int) -> None:
         _LOGGER.warning(
-            f"{self.base_str}: Ignored fault for transaction {transaction_id!r} "
-            f"with condition code {cond!r}. Progress: {progress}"
+            "%s: Ignored fault for transaction %r with condition code %r. Progress: %d",
+            self.base_str,
+            transaction_id,
+            cond,
+            progress,
         )
 
 
 class CfdpUser(CfdpUserBase):
-    def __init__(self, base_str: str, put_req_queue: Queue):
+    def __init__(self, base_str: str, queues: QueueCtx):
         self.base_str = base_str
-        self.put_req_queue = put_req_queue
+        self.put_req_queue = queues.put_req_queue
         # This is a dictionary where the key is the current transaction ID for a transaction which
-        # was triggered by a proxy request with an originating ID.
-        self.active_proxy_put_reqs: dict[TransactionId, TransactionId] = {}
+        # was triggered by a proxy request with an originating ID. The transaction ID is stored
+        # as a tuple of the raw source entity ID and sequence number values, which avoids the
+        # Python level hash and equality methods of the transaction ID class.
+        self.active_proxy_put_reqs: dict[tuple[int, int], TransactionId] = {}
+        # Dispatch table for the handled proxy message types.
+        self._proxy_msg_handlers: dict[
+            ProxyMessageType, Callable[[TransactionId, ReservedCfdpMessage], None]
+        ] = {
+            ProxyMessageType.PUT_REQUEST: self._handle_proxy_put_request,
+            ProxyMessageType.PUT_RESPONSE: self._handle_proxy_put_response,
+        }
         super().__init__()
 
     def transaction_indication(
@@ -132,36 +186,40 @@ class CfdpUser(CfdpUserBase):
     ) -> None:
         """This indication is used to report the transaction ID to the CFDP user"""
         _LOGGER.info(
-            f"{self.base_str}: Transaction.indication for"
-            f" {transaction_indication_params.transaction_id}"
+            "%s: Transaction.indication for %s",
+            self.base_str,
+            transaction_indication_params.transaction_id,
         )
         if transaction_indication_params.originating_transaction_id is not None:
             _LOGGER.info(
-                f"Originating Transaction ID:"
-                f" {transaction_indication_params.originating_transaction_id}"
-            )
-            self.active_proxy_put_reqs.update(
-                {
-                    transaction_indication_params.transaction_id: transaction_indication_params.originating_transaction_id  # noqa: E501
-                }
+                "Originating Transaction ID: %s",
+                transaction_indication_params.originating_transaction_id,
             )
+            self.active_proxy_put_reqs[
+                _transaction_key(transaction_indication_params.transaction_id)
+            ] = transaction_indication_params.originating_transaction_id
 
     def eof_sent_indication(self, transaction_id: TransactionId) -> None:
-        _LOGGER.info(f"{self.base_str}: EOF-Sent.indication for {transaction_id}")
+        _LOGGER.info("%s: EOF-Sent.indication for %s", self.base_str, transaction_id)
 
     def transaction_finished_indication(self, params: TransactionFinishedParams) -> None:
         _LOGGER.info(
-            f"{self.base_str}: Transaction-Finished.indication for {params.transaction_id}."
+            "%s: Transaction-Finished.indication for %s.", self.base_str, params.transaction_id
+        )
+        _LOGGER.info("Condition Code: %r", params.finished_params.condition_code)
+        _LOGGER.info("Delivery Code: %r", params.finished_params.delivery_code)
+        _LOGGER.info("File Status: %r", params.finished_params.file_status)
+        if not self.active_proxy_put_reqs:
+            # Common case: No proxy put request is active.
+            return
+        # Look up and remove the proxy put request entry with one dictionary operation.
+        originating_id = self.active_proxy_put_reqs.pop(
+            _transaction_key(params.transaction_id), None
         )
-        _LOGGER.info(f"Condition Code: {params.finished_params.condition_code!r}")
-        _LOGGER.info(f"Delivery Code: {params.finished_params.delivery_code!r}")
-        _LOGGER.info(f"File Status: {params.finished_params.file_status!r}")
-        if params.transaction_id in self.active_proxy_put_reqs:
+        if originating_id is not None:
             proxy_put_response = ProxyPutResponse(
                 ProxyPutResponseParams.from_finished_params(params.finished_params)
             ).to_generic_msg_to_user_tlv()
-            originating_id = self.active_proxy_put_reqs.get(params.transaction_id)
-            assert originating_id is not None
             put_req = PutRequest(
                 destination_id=originating_id.source_id,
                 source_file=None,
@@ -174,27 +232,27 @@ class CfdpUser(CfdpUserBase):
                 ],
             )
             _LOGGER.info(
-                f"Requesting Proxy Put Response concluding Proxy Put originating from "
-                f"{originating_id}"
+                "Requesting Proxy Put Response concluding Proxy Put originating from %s",
+                originating_id,
             )
             self.put_req_queue.put(put_req)
-            self.active_proxy_put_reqs.pop(params.transaction_id)
 
     def metadata_recv_indication(self, params: MetadataRecvParams) -> None:
-        _LOGGER.info(f"{self.base_str}: Metadata-Recv.indication for {params.transaction_id}.")
-        if params.msgs_to_user is not None:
+        _LOGGER.info("%s: Metadata-Recv.indication for %s.", self.base_str, params.transaction_id)
+        # Also skips empty lists.
+        if params.msgs_to_user:
             self._handle_msgs_to_user(params.transaction_id, params.msgs_to_user)
 
     def _handle_msgs_to_user(
         self, transaction_id: TransactionId, msgs_to_user: list[MessageToUserTlv]
     ) -> None:
         for msg_to_user in msgs_to_user:
-            if msg_to_user.is_reserved_cfdp_message():
-                reserved_msg_tlv = msg_to_user.to_reserved_msg_tlv()
-                assert reserved_msg_tlv is not None
+            # The conversion already checks whether this is a reserved CFDP message.
+            reserved_msg_tlv = msg_to_user.to_reserved_msg_tlv()
+            if reserved_msg_tlv is not None:
                 self._handle_reserved_cfdp_message(transaction_id, reserved_msg_tlv)
             else:
-                _LOGGER.info(f"Received custom message to user: {msg_to_user}")
+                _LOGGER.info("Received custom message to user: %s", msg_to_user)
 
     def _handle_reserved_cfdp_message(
         self, transaction_id: TransactionId, reserved_cfdp_msg: ReservedCfdpMessage
@@ -203,34 +261,43 @@ class CfdpUser(CfdpUserBase):
             self._handle_cfdp_proxy_operation(transaction_id, reserved_cfdp_msg)
         elif reserved_cfdp_msg.is_originating_transaction_id():
             _LOGGER.info(
-                f"Received originating transaction ID: "
-                f"{reserved_cfdp_msg.get_originating_transaction_id()}"
+                "Received originating transaction ID: %s",
+                reserved_cfdp_msg.get_originating_transaction_id(),
             )
 
     def _handle_cfdp_proxy_operation(
         self, transaction_id: TransactionId, reserved_cfdp_msg: ReservedCfdpMessage
     ) -> None:
-        if reserved_cfdp_msg.get_cfdp_proxy_message_type() == ProxyMessageType.PUT_REQUEST:
-            put_req_params = reserved_cfdp_msg.get_proxy_put_request_params()
-            _LOGGER.info(f"Received Proxy Put Request: {put_req_params}")
-            assert put_req_params is not None
-            put_req = PutRequest(
-                destination_id=put_req_params.dest_entity_id,
-                source_file=Path(put_req_params.source_file_as_path),
-                dest_file=Path(put_req_params.dest_file_as_path),
-                trans_mode=None,
-                closure_requested=None,
-                msgs_to_user=[
-                    OriginatingTransactionId(transaction_id).to_generic_msg_to_user_tlv()
-                ],
-            )
-            self.put_req_queue.put(put_req)
-        elif reserved_cfdp_msg.get_cfdp_proxy_message_type() == ProxyMessageType.PUT_RESPONSE:
-            put_response_params = reserved_cfdp_msg.get_proxy_put_response_params()
-            _LOGGER.info(f"Received Proxy Put Response: {put_response_params}")
+        handler = self._proxy_msg_handlers.get(reserved_cfdp_msg.get_cfdp_proxy_message_type())
+        if handler is not None:
+            handler(transaction_id, reserved_cfdp_msg)
+
+    def _handle_proxy_put_request(
+        self, transaction_id: TransactionId, reserved_cfdp_msg: ReservedCfdpMessage
+    ) -> None:
+        put_req_params = reserved_cfdp_msg.get_proxy_put_request_params()
+        _LOGGER.info("Received Proxy Put Request: %s", put_req_params)
+        assert put_req_params is not None
+        put_req = PutRequest(
+            destination_id=put_req_params.dest_entity_id,
+            source_file=Path(put_req_params.source_file_as_path),
+            dest_file=Path(put_req_params.dest_file_as_path),
+            trans_mode=None,
+            closure_requested=None,
+            msgs_to_user=[OriginatingTransactionId(transaction_id).to_generic_msg_to_user_tlv()],
+        )
+        self.put_req_queue.put(put_req)
+
+    def _handle_proxy_put_response(
+        self, _transaction_id: TransactionId, reserved_cfdp_msg: ReservedCfdpMessage
+    ) -> None:
+        put_response_params = reserved_cfdp_msg.get_proxy_put_response_params()
+        _LOGGER.info("Received Proxy Put Response: %s", put_response_params)
 
     def file_segment_recv_indication(self, params: FileSegmentRecvdParams) -> None:
-        _LOGGER.info(f"{self.base_str}: File-Segment-Recv.indication for {params.transaction_id}.")
+        _LOGGER.info(
+            "%s: File-Segment-Recv.indication for %s.", self.base_str, params.transaction_id
+        )
 
     def report_indication(
         self,
@@ -246,35 +313,44 @@ class CfdpUser(CfdpUserBase):
 
     def suspended_indication(self, transaction_id: TransactionId, cond_code: ConditionCode) -> None:
         _LOGGER.info(
-            f"{self.base_str}: Suspended.indication for {transaction_id} |"
-            f" Condition Code: {cond_code}"
+            "%s: Suspended.indication for %s | Condition Code: %s",
+            self.base_str,
+            transaction_id,
+            cond_code,
         )
 
     def resumed_indication(self, transaction_id: TransactionId, progress: int) -> None:
         _LOGGER.info(
-            f"{self.base_str}: Resumed.indication for {transaction_id} | Progress: {progress} bytes"
+            "%s: Resumed.indication for %s | Progress: %d bytes",
+            self.base_str,
+            transaction_id,
+            progress,
         )
 
     def fault_indication(
         self, transaction_id: TransactionId, cond_code: ConditionCode, progress: int
     ) -> None:
         _LOGGER.info(
-            f"{self.base_str}: Fault.indication for {transaction_id} |"
-            f" Condition Code: {cond_code} | "
-            f"Progress: {progress} bytes"
+            "%s: Fault.indication for %s | Condition Code: %s | Progress: %d bytes",
+            self.base_str,
+            transaction_id,
+            cond_code,
+            progress,
         )
 
     def abandoned_indication(
         self, transaction_id: TransactionId, cond_code: ConditionCode, progress: int
     ) -> None:
         _LOGGER.info(
-            f"{self.base_str}: Abandoned.indication for {transaction_id} |"
-            f" Condition Code: {cond_code} |"
-            f" Progress: {progress} bytes"
+            "%s: Abandoned.indication for %s | Condition Code: %s | Progress: %d bytes",
+            self.base_str,
+            transaction_id,
+            cond_code,
+            progress,
         )
 
     def eof_recv_indication(self, transaction_id: TransactionId) -> None:
-        _LOGGER.info(f"{self.base_str}: EOF-Recv.indication for {transaction_id}")
+        _LOGGER.info("%s: EOF-Recv.indication for %s", self.base_str, transaction_id)
 
 
 class CustomCheckTimerProvider(CheckTimerProvider):
@@ -284,102 +360,165 @@ class CustomCheckTimerProvider(CheckTimerProvider):
         remote_entity_id: UnsignedByteField,
         entity_type: EntityType,
     ) -> Countdown:
-        return Countdown(timedelta(seconds=5.0))
+        return Countdown(CHECK_TIMER_INTERVAL)
+
+
+@dataclass
+class QueueCtx:
+    """Queues which are used to exchange put requests and packets between the threads of one
+    entity. Each queue only has a single consumer thread:
+
+    - :py:attr:`put_req_queue`: Consumed by the source entity thread. The CFDP users put proxy
+      put requests into this queue. This is a :py:class:`queue.SimpleQueue` because only the
+      basic put and get operations are required, which avoids the condition variables of
+      :py:class:`queue.Queue`.
+    - :py:attr:`source_entity_queue` and :py:attr:`dest_entity_queue`: Consumed by the source
+      and destination entity threads. Filled by the UDP server.
+    - :py:attr:`tm_queue`: Consumed by the UDP server. Filled by both entity threads.
+
+    :py:meth:`create` can be used to swap the queue implementation for the packet queues."""
+
+    put_req_queue: SimpleQueue
+    source_entity_queue: Queue
+    dest_entity_queue: Queue
+    tm_queue: Queue
+
+    @classmethod
+    def create(cls, queue_factory: Callable[[], Queue] = Queue) -> QueueCtx:
+        return cls(
+            put_req_queue=SimpleQueue(),
+            source_entity_queue=queue_factory(),
+            dest_entity_queue=queue_factory(),
+            tm_queue=queue_factory(),
+        )
+
 
+class UdpServer:
+    """UDP server which uses one thread for receiving and routing packets and one thread for
+    sending the telemetry. Both threads block on the socket or the telemetry queue respectively,
+    so receiving and sending do not stall each other. The sleep time is used as the timeout of
+    these blocking calls so the stop signal is still checked regularly."""
 
-class UdpServer(Thread):
     def __init__(
         self,
         sleep_time: float,
         addr: tuple[str, int],
         explicit_remote_addr: tuple[str, int] | None,
-        tx_queue: Queue,
-        source_entity_rx_queue: Queue,
-        dest_entity_rx_queue: Queue,
+        queues: QueueCtx,
         stop_signal: threading.Event,
     ):
-        super().__init__()
         self.sleep_time = sleep_time
         self.udp_socket = socket.socket(family=socket.AF_INET, type=socket.SOCK_DGRAM)
         self.addr = addr
         self.explicit_remote_addr = explicit_remote_addr
         self.udp_socket.bind(addr)
-        self.tm_queue = tx_queue
+        self.udp_socket.settimeout(sleep_time)
+        # Packets are received into this buffer, which is only used by the receive thread.
+        self._recv_buf = bytearray(4096)
+        self._recv_view = memoryview(self._recv_buf)
+        self.tm_queue = queues.tm_queue
         self.last_sender = None
         self.stop_signal = stop_signal
-        self.source_entity_queue = source_entity_rx_queue
-        self.dest_entity_queue = dest_entity_rx_queue
+        self.source_entity_queue = queues.source_entity_queue
+        self.dest_entity_queue = queues.dest_entity_queue
+        self._reader = Thread(target=self._reader_loop, name="UDP Server RX")
+        self._writer = Thread(target=self._writer_loop, name="UDP Server TX")
 
-    def run(self) -> None:
+    def start(self) -> None:
         _LOGGER.info(f"Starting UDP server on {self.addr}")
-        while True:
-            if self.stop_signal.is_set():
-                break
-            self.periodic_operation()
-            time.sleep(self.sleep_time)
-
-    def periodic_operation(self) -> None:
-        while True:
-            next_packet = self.poll_next_udp_packet()
-            if next_packet is None or next_packet.pdu is None:
-                break
-            # Perform PDU routing.
-            packet_dest = get_packet_destination(next_packet.pdu)
-            _LOGGER.debug(f"UDP server: Routing {next_packet} to {packet_dest}")
-            if packet_dest == PacketDestination.DEST_HANDLER:
-                self.dest_entity_queue.put(next_packet.pdu)
-            elif packet_dest == PacketDestination.SOURCE_HANDLER:
-                self.source_entity_queue.put(next_packet.pdu)
-        self.send_packets()
-
-    def poll_next_udp_packet(self) -> PduHolder | None:
-        ready = select.select([self.udp_socket], [], [], 0)
-        if ready[0]:
-            data, self.last_sender = self.udp_socket.recvfrom(4096)
-            return PduFactory.from_raw_to_holder(data)
-        return None
-
-    def send_packets(self) -> None:
-        while True:
+        self._reader.start()
+        self._writer.start()
+
+    def join(self) -> None:
+        self._reader.join()
+        self._writer.join()
+
+    def _reader_loop(self) -> None:
+        # Resolve the methods used inside the loop only once.
+        poll_next_udp_packet = self.poll_next_udp_packet
+        route_packet = self.route_packet
+        while not self.stop_signal.is_set():
+            next_packet = poll_next_udp_packet()
+            if next_packet is not None:
+                route_packet(next_packet)
+
+    def _writer_loop(self) -> None:
+        get_next_tm = self.tm_queue.get
+        while not self.stop_signal.is_set():
             try:
-                next_tm = self.tm_queue.get(False)
-                if not isinstance(next_tm, bytes) and not isinstance(next_tm, bytearray):
-                    _LOGGER.error(f"UDP server can only sent bytearray, received {next_tm}")
-                    continue
-                if self.explicit_remote_addr is not None:
-                    self.udp_socket.sendto(next_tm, self.explicit_remote_addr)
-                elif self.last_sender is not None:
-                    self.udp_socket.sendto(next_tm, self.last_sender)
-                else:
-                    _LOGGER.warning("UDP Server: No packet destination found, dropping TM")
+                next_tm = get_next_tm(timeout=self.sleep_time)
             except Empty:
-                break
+                continue
+            self.send_tm(next_tm)
+
+    def route_packet(self, packet: bytes) -> None:
+        """Route a packet to the handler queues. Only the PDU header is inspected here, the
+        handler threads are responsible for parsing the PDUs."""
+        packet_dest = get_packet_destination_from_raw(packet)
+        _LOGGER.debug("UDP server: Routing %d bytes to %s", len(packet), packet_dest)
+        if packet_dest == PacketDestination.DEST_HANDLER:
+            self.dest_entity_queue.put(packet)
+        else:
+            self.source_entity_queue.put(packet)
+
+    def poll_next_udp_packet(self) -> bytes | None:
+        """Blocks until the next packet was received or the sleep time has elapsed."""
+        try:
+            nbytes, self.last_sender = self.udp_socket.recvfrom_into(self._recv_buf)
+        except socket.timeout:
+            return None
+        if nbytes == 0:
+            return None
+        # Only copy the bytes which were actually received.
+        return bytes(self._recv_view[:nbytes])
+
+    def send_tm(self, next_tm: list[bytes | bytearray] | bytes | bytearray) -> None:
+        """Each telemetry queue entry can either be a single packet or a list of packets which
+        were generated in one state machine cycle."""
+        if isinstance(next_tm, list):
+            for packet in next_tm:
+                self._send_packet(packet)
+        else:
+            self._send_packet(next_tm)
+
+    def _send_packet(self, packet: bytes | bytearray) -> None:
+        if not isinstance(packet, bytes) and not isinstance(packet, bytearray):
+            _LOGGER.error(f"UDP server can only sent bytearray, received {packet}")
+            return
+        # Each PDU is sent as a separate datagram. Gathering multiple PDUs with sendmsg would
+        # concatenate them into a single datagram.
+        if self.explicit_remote_addr is not None:
+            self.udp_socket.sendto(packet, self.explicit_remote_addr)
+        elif self.last_sender is not None:
+            self.udp_socket.sendto(packet, self.last_sender)
+        else:
+            _LOGGER.warning("UDP Server: No packet destination found, dropping TM")
 
 
 class SourceEntityHandler(Thread):
     def __init__(
         self,
         base_str: str,
-        verbose_level: int,
         source_handler: SourceHandler,
-        put_req_queue: Queue,
-        source_entity_queue: Queue,
-        tm_queue: Queue,
+        queues: QueueCtx,
         stop_signal: threading.Event,
+        poll_timeout: float = 0.2,
     ):
         super().__init__()
         self.base_str = base_str
-        self.verbose_level = verbose_level
         self.source_handler = source_handler
-        self.put_req_queue = put_req_queue
-        self.source_entity_queue = source_entity_queue
-        self.tm_queue = tm_queue
+        self.put_req_queue = queues.put_req_queue
+        self.source_entity_queue = queues.source_entity_queue
+        self.tm_queue = queues.tm_queue
         self.stop_signal = stop_signal
+        self.poll_timeout = poll_timeout
 
     def _idle_handling(self) -> bool:
         try:
-            put_req: PutRequest = self.put_req_queue.get(False)
-            _LOGGER.info(f"{self.base_str}: Handling Put Request: {put_req}")
+            # Block on the queue instead of polling it, the timeout ensures that the stop signal
+            # is still checked regularly.
+            put_req: PutRequest = self.put_req_queue.get(timeout=self.poll_timeout)
+            _LOGGER.info("%s: Handling Put Request: %s", self.base_str, put_req)
             if put_req.destination_id not in [LOCAL_ENTITY_ID, REMOTE_ENTITY_ID]:
                 _LOGGER.warning(
                     f"can only handle put requests target towards {REMOTE_ENTITY_ID} or "
@@ -398,32 +537,32 @@ class SourceEntityHandler(Thread):
             pass
         return False
 
-    def _busy_handling(self) -> bool | None:
-        # We are getting the packets from a Queue here, they could for example also be polled
-        # from a network.
+    def _busy_handling(self, wait_for_packet: bool) -> bool:
+        """Returns whether there was any work to do. If the previous call did not have any work
+        to do, the caller can set ``wait_for_packet`` to block on the packet queue."""
         packet_received = False
         packet = None
         try:
             # We are getting the packets from a Queue here, they could for example also be polled
             # from a network.
-            packet = self.source_entity_queue.get(False)
+            raw_packet = self.source_entity_queue.get(wait_for_packet, self.poll_timeout)
+            packet = PduFactory.from_raw(raw_packet)
             packet_received = True
         except Empty:
             pass
         try:
             packet_sent = self._call_source_state_machine(packet)
-            # If there is no work to do, put the thread to sleep.
-            if not packet_received and not packet_sent:
-                return False
         except SourceFileDoesNotExist:
             _LOGGER.warning("Source file does not exist")
             self.source_handler.reset()
+            return True
+        return packet_received or packet_sent
 
     def _call_source_state_machine(self, packet: AbstractFileDirectiveBase | None) -> bool:
         """Returns whether a packet was sent."""
 
         if packet is not None:
-            _LOGGER.debug(f"{self.base_str}: Inserting {packet}")
+            _LOGGER.debug("%s: Inserting %s", self.base_str, packet)
         try:
             fsm_result = self.source_handler.state_machine(packet)
         except InvalidDestinationId as e:
@@ -434,80 +573,80 @@ class SourceEntityHandler(Thread):
             fsm_result = self.source_handler.state_machine(None)
         packet_sent = False
         if fsm_result.states.num_packets_ready > 0:
-            while fsm_result.states.num_packets_ready > 0:
-                next_pdu_wrapper = self.source_handler.get_next_packet()
-                assert next_pdu_wrapper is not None
-                if self.verbose_level >= 1:
-                    _LOGGER.debug(f"{self.base_str}: Sending packet {next_pdu_wrapper.pdu}")
-                # Send all packets which need to be sent.
-                self.tm_queue.put(next_pdu_wrapper.pack())
-                packet_sent = True
+            batch = []
+            for next_pdu_wrapper in self.source_handler.get_next_packets():
+                _LOGGER.debug("%s: Sending packet %s", self.base_str, next_pdu_wrapper.pdu)
+                batch.append(next_pdu_wrapper.pack())
+            # Send all packets which need to be sent with one queue operation.
+            self.tm_queue.put(batch)
+            packet_sent = True
         return packet_sent
 
     def run(self) -> None:
         _LOGGER.info(f"Starting {self.base_str}")
-        while True:
-            if self.stop_signal.is_set():
-                break
-            if self.source_handler.state == CfdpState.IDLE and not self._idle_handling():
-                time.sleep(0.2)
+        work_done = True
+        while not self.stop_signal.is_set():
+            if self.source_handler.state == CfdpState.IDLE:
+                work_done = self._idle_handling()
                 continue
-            if self.source_handler.state == CfdpState.BUSY and not self._busy_handling():
-                time.sleep(0.2)
+            if self.source_handler.state == CfdpState.BUSY:
+                # Only block on the packet queue if there was nothing to do in the last cycle.
+                # Otherwise, for example when sending file data, the handler would be stalled.
+                work_done = self._busy_handling(not work_done)
 
 
 class DestEntityHandler(Thread):
     def __init__(
         self,
         base_str: str,
-        verbose_level: int,
         dest_handler: DestHandler,
-        dest_entity_queue: Queue,
-        tm_queue: Queue,
+        queues: QueueCtx,
         stop_signal: threading.Event,
+        poll_timeout: float = 0.5,
     ):
         super().__init__()
         self.base_str = base_str
-        self.verbose_level = verbose_level
         self.dest_handler = dest_handler
-        self.dest_entity_queue = dest_entity_queue
-        self.tm_queue = tm_queue
+        self.dest_entity_queue = queues.dest_entity_queue
+        self.tm_queue = queues.tm_queue
         self.stop_signal = stop_signal
+        self.poll_timeout = poll_timeout
 
     def run(self) -> None:
         _LOGGER.info(f"Starting {self.base_str}. Local ID {self.dest_handler.cfg.local_entity_id}")
-        while True:
+        work_done = True
+        while not self.stop_signal.is_set():
             packet_received = False
             packet = None
-            if self.stop_signal.is_set():
-                break
             try:
-                packet = self.dest_entity_queue.get(False)
+                # If there was no work to do in the last cycle, block on the queue until the
+                # next packet arrives. The timeout ensures that the state machine is still called
+                # regularly, which is required for timer handling.
+                raw_packet = self.dest_entity_queue.get(not work_done, self.poll_timeout)
+                packet = PduFactory.from_raw(raw_packet)
                 packet_received = True
             except Empty:
                 pass
             if packet is not None:
-                _LOGGER.debug(f"{self.base_str}: Inserting {packet}")
+                _LOGGER.debug("%s: Inserting %s", self.base_str, packet)
             fsm_result = self.dest_handler.state_machine(packet)
             packet_sent = False
             if fsm_result.states.num_packets_ready > 0:
-                while fsm_result.states.num_packets_ready > 0:
-                    next_pdu_wrapper = self.dest_handler.get_next_packet()
-                    assert next_pdu_wrapper is not None
-                    if self.verbose_level >= 1:
-                        _LOGGER.debug(f"{self.base_str}: Sending packet {next_pdu_wrapper.pdu}")
-                    self.tm_queue.put(next_pdu_wrapper.pack())
-                    packet_sent = True
-            # If there is no work to do, put the thread to sleep.
-            if not packet_received and not packet_sent:
-                time.sleep(0.5)
+                batch = []
+                for next_pdu_wrapper in self.dest_handler.get_next_packets():
+                    _LOGGER.debug("%s: Sending packet %s", self.base_str, next_pdu_wrapper.pdu)
+                    batch.append(next_pdu_wrapper.pack())
+                self.tm_queue.put(batch)
+                packet_sent = True
+            work_done = packet_received or packet_sent
 
 
 def parse_remote_addr_from_json(file_path: Path) -> str | None:
+    """Returns None if the file does not exist. The file is read directly instead of checking
+    its existence first, which avoids an additional stat call."""
     try:
-        with open(file_path) as file:
-            data = json.load(file)
-            return data.get("remote_addr")
+        data = json.loads(file_path.read_bytes())
+        return data.get("remote_addr")
     except FileNotFoundError:
         return None
     except json.JSONDecodeError:
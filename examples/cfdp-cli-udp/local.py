@@ -7,7 +7,6 @@ import logging
 import threading
 import time
 from logging import basicConfig
-from multiprocessing import Queue
 from pathlib import Path
 
 from common import (
@@ -21,6 +20,7 @@ from common import (
     CfdpUser,
     CustomCheckTimerProvider,
     DestEntityHandler,
+    QueueCtx,
     SourceEntityHandler,
     UdpServer,
     parse_remote_addr_from_json,
@@ -46,18 +46,6 @@ BASE_STR_SRC = "LOCAL SRC"
 BASE_STR_DEST = "LOCAL DEST"
 LOCAL_CFG_JSON_PATH = "local_cfg.json"
 
-# This queue is used to send put requests.
-PUT_REQ_QUEUE = Queue()
-# All telecommands which should go to the source handler should be put into this queue by
-# the UDP server.
-SOURCE_ENTITY_QUEUE = Queue()
-# All telecommands which should go to the destination handler should be put into this queue by
-# the UDP server.
-DEST_ENTITY_QUEUE = Queue()
-# All telemetry which should be sent to the remote entity is put into this queue and will then
-# be sent by the UDP server.
-TM_QUEUE = Queue()
-
 
 def main() -> None:
     parser = argparse.ArgumentParser(prog="CFDP Local Entity Application")
@@ -65,6 +53,7 @@ def main() -> None:
     add_cfdp_procedure_arguments(parser)
     args = parser.parse_args()
     stop_signal = threading.Event()
+    queues = QueueCtx.create()
 
     logging_level = logging.INFO
     if args.verbose >= 1:
@@ -76,7 +65,7 @@ def main() -> None:
         put_req = generic_cfdp_params_to_put_request(
             cfdp_params, LOCAL_ENTITY_ID, REMOTE_ENTITY_ID, LOCAL_ENTITY_ID
         )
-        PUT_REQ_QUEUE.put(put_req)
+        queues.put_req_queue.put(put_req)
 
     basicConfig(level=logging_level)
 
@@ -86,7 +75,7 @@ def main() -> None:
     src_fault_handler = CfdpFaultHandler(BASE_STR_SRC)
     # 16 bit sequence count for transactions.
     src_seq_count_provider = SeqCountProvider(16)
-    src_user = CfdpUser(BASE_STR_SRC, PUT_REQ_QUEUE)
+    src_user = CfdpUser(BASE_STR_SRC, queues)
     check_timer_provider = CustomCheckTimerProvider()
     source_handler = SourceHandler(
         cfg=LocalEntityCfg(LOCAL_ENTITY_ID, INDICATION_CFG, src_fault_handler),
@@ -97,17 +86,14 @@ def main() -> None:
     )
     source_entity_task = SourceEntityHandler(
         BASE_STR_SRC,
-        logging_level,
         source_handler,
-        PUT_REQ_QUEUE,
-        SOURCE_ENTITY_QUEUE,
-        TM_QUEUE,
+        queues,
         stop_signal,
     )
 
     # Enable all indications.
     dest_fault_handler = CfdpFaultHandler(BASE_STR_DEST)
-    dest_user = CfdpUser(BASE_STR_DEST, PUT_REQ_QUEUE)
+    dest_user = CfdpUser(BASE_STR_DEST, queues)
     dest_handler = DestHandler(
         cfg=LocalEntityCfg(LOCAL_ENTITY_ID, INDICATION_CFG, dest_fault_handler),
         user=dest_user,
@@ -116,10 +102,8 @@ def main() -> None:
     )
     dest_entity_task = DestEntityHandler(
         BASE_STR_DEST,
-        logging_level,
         dest_handler,
-        DEST_ENTITY_QUEUE,
-        TM_QUEUE,
+        queues,
         stop_signal,
     )
 
@@ -127,21 +111,18 @@ def main() -> None:
     local_addr = ipaddress.ip_address("0.0.0.0")
     # Localhost as default.
     remote_addr = ipaddress.ip_address("127.0.0.1")
-    if Path(LOCAL_CFG_JSON_PATH).exists():
-        addr_from_cfg = parse_remote_addr_from_json(Path(LOCAL_CFG_JSON_PATH))
-        if addr_from_cfg is not None:
-            try:
-                remote_addr = ipaddress.ip_address(addr_from_cfg)
-            except ValueError:
-                _LOGGER.warning(f"invalid remote address {remote_addr} from JSON file")
+    addr_from_cfg = parse_remote_addr_from_json(Path(LOCAL_CFG_JSON_PATH))
+    if addr_from_cfg is not None:
+        try:
+            remote_addr = ipaddress.ip_address(addr_from_cfg)
+        except ValueError:
+            _LOGGER.warning(f"invalid remote address {remote_addr} from JSON file")
     _LOGGER.info(f"Put request will be sent to remote destination {remote_addr}")
     udp_server = UdpServer(
         sleep_time=0.1,
         addr=(str(local_addr), LOCAL_PORT),
         explicit_remote_addr=(str(remote_addr), REMOTE_PORT),
-        tx_queue=TM_QUEUE,
-        source_entity_rx_queue=SOURCE_ENTITY_QUEUE,
-        dest_entity_rx_queue=DEST_ENTITY_QUEUE,
+        queues=queues,
         stop_signal=stop_signal,
     )
 
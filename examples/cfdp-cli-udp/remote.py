@@ -6,7 +6,6 @@ import logging
 import threading
 import time
 from logging import basicConfig
-from multiprocessing import Queue
 
 from common import (
     INDICATION_CFG,
@@ -17,6 +16,7 @@ from common import (
     CfdpUser,
     CustomCheckTimerProvider,
     DestEntityHandler,
+    QueueCtx,
     SourceEntityHandler,
     UdpServer,
 )
@@ -35,23 +35,12 @@ _LOGGER = logging.getLogger(__name__)
 BASE_STR_SRC = "REMOTE SRC"
 BASE_STR_DEST = "REMOTE DEST"
 
-# This queue is used to send put requests.
-PUT_REQ_QUEUE = Queue()
-# All telecommands which should go to the source handler should be put into this queue by
-# the UDP server.
-SOURCE_ENTITY_QUEUE = Queue()
-# All telecommands which should go to the destination handler should be put into this queue by
-# the UDP server.
-DEST_ENTITY_QUEUE = Queue()
-# All telemetry which should be sent to the local entity is put into this queue and will then
-# be sent by the UDP server.
-TM_QUEUE = Queue()
-
 
 def main() -> None:
     parser = argparse.ArgumentParser(prog="CFDP Remote Entity Application")
     parser.add_argument("-v", "--verbose", action="count", default=0)
     stop_signal = threading.Event()
+    queues = QueueCtx.create()
     args = parser.parse_args()
     logging_level = logging.INFO
     if args.verbose >= 1:
@@ -61,7 +50,7 @@ def main() -> None:
     src_fault_handler = CfdpFaultHandler(BASE_STR_SRC)
     # 16 bit sequence count for transactions.
     src_seq_count_provider = SeqCountProvider(16)
-    src_user = CfdpUser(BASE_STR_SRC, PUT_REQ_QUEUE)
+    src_user = CfdpUser(BASE_STR_SRC, queues)
     remote_cfg_table = RemoteEntityCfgTable()
     remote_cfg_table.add_config(REMOTE_CFG_OF_LOCAL_ENTITY)
     check_timer_provider = CustomCheckTimerProvider()
@@ -74,17 +63,14 @@ def main() -> None:
     )
     source_entity_task = SourceEntityHandler(
         BASE_STR_SRC,
-        logging_level,
         source_handler,
-        PUT_REQ_QUEUE,
-        SOURCE_ENTITY_QUEUE,
-        TM_QUEUE,
+        queues,
         stop_signal,
     )
 
     # Enable all indications.
     dest_fault_handler = CfdpFaultHandler(BASE_STR_DEST)
-    dest_user = CfdpUser(BASE_STR_DEST, PUT_REQ_QUEUE)
+    dest_user = CfdpUser(BASE_STR_DEST, queues)
     dest_handler = DestHandler(
         cfg=LocalEntityCfg(REMOTE_ENTITY_ID, INDICATION_CFG, dest_fault_handler),
         user=dest_user,
@@ -93,10 +79,8 @@ def main() -> None:
     )
     dest_entity_task = DestEntityHandler(
         BASE_STR_DEST,
-        logging_level,
         dest_handler,
-        DEST_ENTITY_QUEUE,
-        TM_QUEUE,
+        queues,
         stop_signal,
     )
 
@@ -107,9 +91,7 @@ def main() -> None:
         addr=(local_addr, REMOTE_PORT),
         # No explicit remote address, remote server only responds to requests.
         explicit_remote_addr=None,
-        tx_queue=TM_QUEUE,
-        source_entity_rx_queue=SOURCE_ENTITY_QUEUE,
-        dest_entity_rx_queue=DEST_ENTITY_QUEUE,
+        queues=queues,
         stop_signal=stop_signal,
     )
 
@@ -56,6 +56,8 @@ DEST_ENTITY_ID = ByteFieldU16(REMOTE_ENTITY_ID_RAW)
 FILE_CONTENT = "Hello World!"
 SOURCE_FILE = Path("files/local.txt")
 DEST_FILE = Path("files/remote.txt")
+# The check timer interval is constant, so only the countdown needs to be created for each timer.
+CHECK_TIMER_INTERVAL = timedelta(seconds=5.0)
 
 
 @dataclass
@@ -181,7 +183,7 @@ class CustomCheckTimerProvider(CheckTimerProvider):
         remote_entity_id: UnsignedByteField,
         entity_type: EntityType,
     ) -> Countdown:
-        return Countdown(timedelta(seconds=5.0))
+        return Countdown(CHECK_TIMER_INTERVAL)
 
 
 def main() -> None:
@@ -3,17 +3,13 @@
 components provided by the tmtccmd package."""
 
 import argparse
-import copy
+import asyncio
 import logging
 import os
-import threading
-import time
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import timedelta
 from logging import basicConfig
-from multiprocessing import Queue
 from pathlib import Path
-from queue import Empty
 from typing import Any
 
 from spacepackets.cfdp import (
@@ -55,6 +51,11 @@ FILE_SEGMENT_SIZE = len(FILE_CONTENT)
 MAX_PACKET_LEN = 512
 SOURCE_FILE = Path("/tmp/cfdp-test-source.txt")
 DEST_FILE = Path("/tmp/cfdp-test-dest.txt")
+# Maximum time the handlers block on their packet queue if there is no work to do. The state
+# machines still need to be called regularly for timer handling.
+QUEUE_TIMEOUT = 0.1
+# The check timer interval is constant, so only the countdown needs to be created for each timer.
+CHECK_TIMER_INTERVAL = timedelta(seconds=5.0)
 
 
 @dataclass
@@ -62,6 +63,7 @@ class TransferParams:
     transmission_mode: TransmissionMode
     verbose_level: int
     no_closure: bool
+    source_file_content: bytes
 
 
 _LOGGER = logging.getLogger()
@@ -76,12 +78,8 @@ REMOTE_CFG_FOR_SOURCE_ENTITY = RemoteEntityCfg(
     default_transmission_mode=TransmissionMode.ACKNOWLEDGED,
     crc_type=ChecksumType.CRC_32,
 )
-REMOTE_CFG_FOR_DEST_ENTITY = copy.copy(REMOTE_CFG_FOR_SOURCE_ENTITY)
-REMOTE_CFG_FOR_DEST_ENTITY.entity_id = DEST_ENTITY_ID
-
-# These queues will be used to exchange PDUs between threads.
-SOURCE_TO_DEST_QUEUE = Queue()
-DEST_TO_SOURCE_QUEUE = Queue()
+# Same configuration, only the entity ID is different.
+REMOTE_CFG_FOR_DEST_ENTITY = replace(REMOTE_CFG_FOR_SOURCE_ENTITY, entity_id=DEST_ENTITY_ID)
 
 
 class CfdpFaultHandler(DefaultFaultHandlerBase):
@@ -89,30 +87,39 @@ class CfdpFaultHandler(DefaultFaultHandlerBase):
         self, transaction_id: TransactionId, cond: ConditionCode, progress: int
     ) -> None:
         _LOGGER.warning(
-            f"Received Notice of Suspension for transaction {transaction_id!r} with condition "
-            f"code {cond!r}. Progress: {progress}"
+            "Received Notice of Suspension for transaction %r with condition code %r. Progress: %d",
+            transaction_id,
+            cond,
+            progress,
         )
 
     def notice_of_cancellation_cb(
         self, transaction_id: TransactionId, cond: ConditionCode, progress: int
     ) -> None:
         _LOGGER.warning(
-            f"Received Notice of Cancellation for transaction {transaction_id!r} with condition "
-            f"code {cond!r}. Progress: {progress}"
+            "Received Notice of Cancellation for transaction %r with condition code %r. "
+            "Progress: %d",
+            transaction_id,
+            cond,
+            progress,
         )
 
     def abandoned_cb(
         self, transaction_id: TransactionId, cond: ConditionCode, progress: int
     ) -> None:
         _LOGGER.warning(
-            f"Received Abandoned Fault for transaction {transaction_id!r} with condition "
-            f"code {cond!r}. Progress: {progress}"
+            "Received Abandoned Fault for transaction %r with condition code %r. Progress: %d",
+            transaction_id,
+            cond,
+            progress,
         )
 
     def ignore_cb(self, transaction_id: TransactionId, cond: ConditionCode, progress: int) -> None:
         _LOGGER.warning(
-            f"Ignored Fault for transaction {transaction_id!r} with condition "
-            f"code {cond!r}. Progress: {progress}"
+            "Ignored Fault for transaction %r with condition code %r. Progress: %d",
+            transaction_id,
+            cond,
+            progress,
         )
 
 
@@ -127,23 +134,26 @@ class CfdpUser(CfdpUserBase):
     ) -> None:
         """This indication is used to report the transaction ID to the CFDP user"""
         _LOGGER.info(
-            f"{self.base_str}: "
-            f"Transaction.indication for {transaction_indication_params.transaction_id}"
+            "%s: Transaction.indication for %s",
+            self.base_str,
+            transaction_indication_params.transaction_id,
         )
 
     def eof_sent_indication(self, transaction_id: TransactionId) -> None:
-        _LOGGER.info(f"{self.base_str}: EOF-Sent.indication for {transaction_id}")
+        _LOGGER.info("%s: EOF-Sent.indication for %s", self.base_str, transaction_id)
 
     def transaction_finished_indication(self, params: TransactionFinishedParams) -> None:
         _LOGGER.info(
-            f"{self.base_str}: Transaction-Finished.indication for {params.transaction_id}."
+            "%s: Transaction-Finished.indication for %s.", self.base_str, params.transaction_id
         )
 
     def metadata_recv_indication(self, params: MetadataRecvParams) -> None:
-        _LOGGER.info(f"{self.base_str}: Metadata-Recv.indication for {params.transaction_id}.")
+        _LOGGER.info("%s: Metadata-Recv.indication for %s.", self.base_str, params.transaction_id)
 
     def file_segment_recv_indication(self, params: FileSegmentRecvdParams) -> None:
-        _LOGGER.info(f"{self.base_str}: File-Segment-Recv.indication for {params.transaction_id}.")
+        _LOGGER.info(
+            "%s: File-Segment-Recv.indication for %s.", self.base_str, params.transaction_id
+        )
 
     def report_indication(
         self,
@@ -159,35 +169,44 @@ class CfdpUser(CfdpUserBase):
 
     def suspended_indication(self, transaction_id: TransactionId, cond_code: ConditionCode) -> None:
         _LOGGER.info(
-            f"{self.base_str}: Suspended.indication for {transaction_id} |"
-            f" Condition Code: {cond_code}"
+            "%s: Suspended.indication for %s | Condition Code: %s",
+            self.base_str,
+            transaction_id,
+            cond_code,
         )
 
     def resumed_indication(self, transaction_id: TransactionId, progress: int) -> None:
         _LOGGER.info(
-            f"{self.base_str}: Resumed.indication for {transaction_id} | Progress: {progress} bytes"
+            "%s: Resumed.indication for %s | Progress: %d bytes",
+            self.base_str,
+            transaction_id,
+            progress,
         )
 
     def fault_indication(
         self, transaction_id: TransactionId, cond_code: ConditionCode, progress: int
     ) -> None:
         _LOGGER.info(
-            f"{self.base_str}: Fault.indication for {transaction_id} |"
-            f" Condition Code: {cond_code} | "
-            f"Progress: {progress} bytes"
+            "%s: Fault.indication for %s | Condition Code: %s | Progress: %d bytes",
+            self.base_str,
+            transaction_id,
+            cond_code,
+            progress,
         )
 
     def abandoned_indication(
         self, transaction_id: TransactionId, cond_code: ConditionCode, progress: int
     ) -> None:
         _LOGGER.info(
-            f"{self.base_str}: Abandoned.indication for {transaction_id} |"
-            f" Condition Code: {cond_code} |"
-            f" Progress: {progress} bytes"
+            "%s: Abandoned.indication for %s | Condition Code: %s | Progress: %d bytes",
+            self.base_str,
+            transaction_id,
+            cond_code,
+            progress,
         )
 
     def eof_recv_indication(self, transaction_id: TransactionId) -> None:
-        _LOGGER.info(f"{self.base_str}: EOF-Recv.indication for {transaction_id}")
+        _LOGGER.info("%s: EOF-Recv.indication for %s", self.base_str, transaction_id)
 
 
 class CustomCheckTimerProvider(CheckTimerProvider):
@@ -197,7 +216,7 @@ class CustomCheckTimerProvider(CheckTimerProvider):
         remote_entity_id: UnsignedByteField,
         entity_type: EntityType,
     ) -> Countdown:
-        return Countdown(timedelta(seconds=5.0))
+        return Countdown(CHECK_TIMER_INTERVAL)
 
 
 def main() -> None:
@@ -224,16 +243,17 @@ def main() -> None:
     if args.verbose >= 1:
         logging_level = logging.DEBUG
     assert transmission_mode is not None
-    transfer_params = TransferParams(transmission_mode, args.verbose, args.no_closure)
     basicConfig(level=logging_level)
 
-    # If the test files already exist, delete them.
-    if SOURCE_FILE.exists():
-        os.remove(SOURCE_FILE)
+    # If the destination file already exists, delete it. The source file is overwritten.
     if DEST_FILE.exists():
         os.remove(DEST_FILE)
-    with open(SOURCE_FILE, "w") as file:
-        file.write(FILE_CONTENT)
+    # The source file content is kept, it is also used for the final verification.
+    source_file_content = FILE_CONTENT.encode()
+    SOURCE_FILE.write_bytes(source_file_content)
+    transfer_params = TransferParams(
+        transmission_mode, args.verbose, args.no_closure, source_file_content
+    )
 
     remote_cfg_table = RemoteEntityCfgTable()
     remote_cfg_table.add_config(REMOTE_CFG_FOR_SOURCE_ENTITY)
@@ -254,13 +274,6 @@ def main() -> None:
         user=src_user,
         check_timer_provider=check_timer_provider,
     )
-    # Spawn a new thread and move the source handler there. This is scalable: If multiple number
-    # of concurrent file operations are required, a new thread with a new source handler can
-    # be spawned for each one.
-    source_thread = threading.Thread(
-        target=source_entity_handler, args=[transfer_params, source_handler]
-    )
-
     # Enable all indications.
     dest_indication_cfg = IndicationCfg()
     dest_fault_handler = CfdpFaultHandler()
@@ -272,22 +285,11 @@ def main() -> None:
         remote_cfg_table=remote_cfg_table,
         check_timer_provider=check_timer_provider,
     )
-    # Spawn a new thread and move the destination handler there. This is scalable. One example
-    # approach could be to keep a dictionary of active file copy operations, where the transaction
-    # ID is the key. If a new Metadata PDU with a new transaction ID is detected, a new
-    # destination handler in a new thread could be spawned to handle the file copy operation.
-    dest_thread = threading.Thread(target=dest_entity_handler, args=[transfer_params, dest_handler])
-
-    source_thread.start()
-    dest_thread.start()
-    source_thread.join()
-    dest_thread.join()
-
-    with open(SOURCE_FILE) as file:
-        src_file_content = file.read()
-    with open(DEST_FILE) as file:
-        dest_file_content = file.read()
-    assert src_file_content == dest_file_content
+    asyncio.run(run_handlers(transfer_params, source_handler, dest_handler))
+
+    dest_file_content = DEST_FILE.read_bytes()
+    print(f"File content of destination file {DEST_FILE}: {dest_file_content.decode()}")
+    assert transfer_params.source_file_content == dest_file_content
     _LOGGER.info("Source and destination file content are equal. Deleting files.")
     if SOURCE_FILE.exists():
         os.remove(SOURCE_FILE)
@@ -296,7 +298,49 @@ def main() -> None:
     _LOGGER.info("Done.")
 
 
-def source_entity_handler(transfer_params: TransferParams, source_handler: SourceHandler) -> None:
+async def run_handlers(
+    transfer_params: TransferParams, source_handler: SourceHandler, dest_handler: DestHandler
+) -> None:
+    # These queues will be used to exchange PDUs between the handlers. Each queue entry is a list
+    # of all PDUs generated in one handler cycle.
+    source_to_dest_queue = asyncio.Queue()
+    dest_to_source_queue = asyncio.Queue()
+    # Both handlers run as tasks of the same event loop. The state machines do not block, so they
+    # can be scheduled cooperatively without the thread switching overhead. This is scalable: If
+    # multiple concurrent file operations are required, a new task with a new handler can be
+    # spawned for each one. For the destination side, one example approach could be to keep a
+    # dictionary of active file copy operations, where the transaction ID is the key. If a new
+    # Metadata PDU with a new transaction ID is detected, a new destination handler task could be
+    # spawned to handle the file copy operation.
+    await asyncio.gather(
+        source_entity_handler(
+            transfer_params, source_handler, dest_to_source_queue, source_to_dest_queue
+        ),
+        dest_entity_handler(
+            transfer_params, dest_handler, source_to_dest_queue, dest_to_source_queue
+        ),
+    )
+
+
+async def get_next_packets(rx_queue: asyncio.Queue, block: bool) -> list:
+    """Returns the next list of received packets, or a list with only None if there are none.
+    If ``block`` is not set, the call still yields to the event loop so the other handler can
+    process the packets which were sent."""
+    try:
+        if block:
+            return await asyncio.wait_for(rx_queue.get(), QUEUE_TIMEOUT)
+        await asyncio.sleep(0)
+        return rx_queue.get_nowait()
+    except (asyncio.QueueEmpty, asyncio.TimeoutError):
+        return [None]
+
+
+async def source_entity_handler(
+    transfer_params: TransferParams,
+    source_handler: SourceHandler,
+    rx_queue: asyncio.Queue,
+    tx_queue: asyncio.Queue,
+) -> None:
     # This put request could in principle also be sent from something like a front end application.
     put_request = PutRequest(
         destination_id=DEST_ENTITY_ID,
@@ -306,69 +350,64 @@ def source_entity_handler(transfer_params: TransferParams, source_handler: Sourc
         closure_requested=not transfer_params.no_closure,
     )
     print(f"SRC HANDLER: Inserting Put Request: {put_request}")
-    with open(SOURCE_FILE) as file:
-        file_content = file.read()
-        print(f"File content of source file {SOURCE_FILE}: {file_content}")
+    print(
+        f"File content of source file {SOURCE_FILE}: {transfer_params.source_file_content.decode()}"
+    )
     assert source_handler.put_request(put_request)
 
+    packet_sent = True
     while True:
-        packet = None
-        try:
-            # We are getting the packets from a Queue here, they could for example also be polled
-            # from a network.
-            packet = DEST_TO_SOURCE_QUEUE.get(False)
-        except Empty:
-            pass
-        fsm_result = source_handler.state_machine(packet)
-        packet_sent = False
-        if fsm_result.states.num_packets_ready > 0:
+        # We are getting the packets from a Queue here, they could for example also be polled
+        # from a network. Only block if no packet was sent in the last cycle, otherwise the
+        # sending of file data would be stalled.
+        packets = await get_next_packets(rx_queue, not packet_sent)
+        pdus_to_send = []
+        for packet in packets:
+            fsm_result = source_handler.state_machine(packet)
             while fsm_result.states.num_packets_ready > 0:
                 next_pdu_wrapper = source_handler.get_next_packet()
                 assert next_pdu_wrapper is not None
                 if transfer_params.verbose_level >= 1:
                     _LOGGER.debug(f"SRC Handler: Sending packet {next_pdu_wrapper.pdu}")
-                # Send all packets which need to be sent.
-                SOURCE_TO_DEST_QUEUE.put(next_pdu_wrapper.pdu)
-                packet_sent = True
-        # If there is no work to do, put the thread to sleep.
-        if packet is None and not packet_sent:
-            time.sleep(0.5)
+                pdus_to_send.append(next_pdu_wrapper.pdu)
+        # Send all packets which need to be sent with one queue operation.
+        packet_sent = len(pdus_to_send) > 0
+        if packet_sent:
+            tx_queue.put_nowait(pdus_to_send)
         # Transaction done
         if fsm_result.states.state == CfdpState.IDLE:
             _LOGGER.info("Source entity operation done.")
             break
 
 
-def dest_entity_handler(transfer_params: TransferParams, dest_handler: DestHandler) -> None:
+async def dest_entity_handler(
+    transfer_params: TransferParams,
+    dest_handler: DestHandler,
+    rx_queue: asyncio.Queue,
+    tx_queue: asyncio.Queue,
+) -> None:
     first_packet = True
+    packet_sent = True
     while True:
-        packet = None
-        try:
-            packet = SOURCE_TO_DEST_QUEUE.get(False)
-            if first_packet:
-                first_packet = False
-        except Empty:
-            pass
-        fsm_result = dest_handler.state_machine(packet)
-        packet_sent = False
-        if fsm_result.states.num_packets_ready > 0:
+        packets = await get_next_packets(rx_queue, not packet_sent)
+        if first_packet and packets[0] is not None:
+            first_packet = False
+        pdus_to_send = []
+        for packet in packets:
+            fsm_result = dest_handler.state_machine(packet)
             while fsm_result.states.num_packets_ready > 0:
                 next_pdu_wrapper = dest_handler.get_next_packet()
                 assert next_pdu_wrapper is not None
                 if transfer_params.verbose_level >= 1:
                     _LOGGER.debug(f"DEST Handler: Sending packet {next_pdu_wrapper.pdu}")
-                DEST_TO_SOURCE_QUEUE.put(next_pdu_wrapper.pdu)
-                packet_sent = True
-        # If there is no work to do, put the thread to sleep.
-        if packet is None and not packet_sent:
-            time.sleep(0.5)
+                pdus_to_send.append(next_pdu_wrapper.pdu)
+        packet_sent = len(pdus_to_send) > 0
+        if packet_sent:
+            tx_queue.put_nowait(pdus_to_send)
         # Transaction done
         if not first_packet and fsm_result.states.state == CfdpState.IDLE:
             _LOGGER.info("Destination entity operation done.")
             break
-    with open(DEST_FILE) as file:
-        file_content = file.read()
-        print(f"File content of destination file {DEST_FILE}: {file_content}")
 
 
 if __name__ == "__main__":
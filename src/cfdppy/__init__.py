@@ -2,11 +2,14 @@
 to convert CLI or GUI parameters into the internalized CFDP classes. You can find all those
 helpers inside the :py:mod:`tmtccmd.config.cfdp` module."""
 
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
 from spacepackets.cfdp import TransactionId
 
 from .defs import CfdpIndication, CfdpState
-from .filestore import HostFilestore, VirtualFilestore
-from .handler.common import PacketDestination, get_packet_destination
 from .mib import (
     IndicationCfg,
     LocalEntityCfg,
@@ -14,8 +17,27 @@ from .mib import (
     RemoteEntityCfgTable,
 )
 from .request import PutRequest
-from .restricted_filestore import RestrictedFilestore
-from .user import CfdpUserBase
+
+if TYPE_CHECKING:
+    from .filestore import HostFilestore, VirtualFilestore
+    from .handler.common import PacketDestination, get_packet_destination
+    from .restricted_filestore import RestrictedFilestore
+    from .user import CfdpUserBase
+
+# These members are only imported on first access. This avoids importing the filestore, user and
+# handler modules when importing the package, for example if only the put request or the
+# configuration classes are required.
+_LAZY_IMPORTS = {
+    "HostFilestore": ".filestore",
+    "VirtualFilestore": ".filestore",
+    "PacketDestination": ".handler.common",
+    "get_packet_destination": ".handler.common",
+    "RestrictedFilestore": ".restricted_filestore",
+    "CfdpUserBase": ".user",
+}
+# Submodules which were available as package attributes after importing the package when all
+# members were imported eagerly.
+_LAZY_SUBMODULES = frozenset(("filestore", "handler", "restricted_filestore", "user"))
 
 __all__ = [
     "CfdpIndication",
@@ -33,3 +55,20 @@ __all__ = [
     "VirtualFilestore",
     "get_packet_destination",
 ]
+
+
+def __getattr__(name: str) -> Any:  # noqa ANN401
+    if name in _LAZY_SUBMODULES:
+        # Importing the submodule also binds it as an attribute of this package.
+        return importlib.import_module(f".{name}", __name__)
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    member = getattr(importlib.import_module(module_name, __name__), name)
+    # Cache the member so this function is only called once for each lazy import.
+    globals()[name] = member
+    return member
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__) | _LAZY_SUBMODULES)
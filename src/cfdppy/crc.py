@@ -1,17 +1,84 @@
-import struct
-from pathlib import Path
+from __future__ import annotations  # Python 3.9 compatibility for | syntax
+
+import os
+import zlib
+from typing import TYPE_CHECKING
+
+from crcmod.predefined import PredefinedCrc
+from spacepackets.cfdp.defs import ChecksumType
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+    from crcmod import Crc
+
+# Maximum number of bytes which are read and summed up at once.
+_BLOCK_SIZE = 1 << 17
+# Shifts of the four byte lanes of a data block, indexed by the word position of its first byte.
+_LANE_SHIFTS = tuple(tuple(8 * (3 - (start + lane) % 4) for lane in range(4)) for start in range(4))
 
 
 def calc_modular_checksum(file_path: Path) -> bytes:
     """Calculates the modular checksum for a file in one go."""
     checksum = 0
+    offset = 0
+    # The blocks are read directly into the buffer, without an additional buffered reader.
+    with open(file_path, "rb", buffering=0) as file:
+        # Small files only require a buffer of their own size.
+        block = bytearray(max(min(os.fstat(file.fileno()).st_size, _BLOCK_SIZE), 1))
+        while read_len := file.readinto(block):
+            checksum += _modular_sum(block if read_len == len(block) else block[:read_len], offset)
+            offset += read_len
+    return (checksum % 2**32).to_bytes(4, byteorder="big")
+
+
+def _modular_sum(data: bytearray, offset: int) -> int:
+    """Sums up the data as big endian 32-bit words, with the last word being padded with zeros.
+
+    Instead of converting the data to words, the bytes at each of the four positions inside a word
+    are summed up separately and shifted to their position afterwards. Summing up bytes does not
+    create any integer objects because small integers are cached, and the missing bytes of a
+    partial last word simply do not contribute to the sum. The offset of the data inside the file
+    determines the word position of each byte, so the data does not need to start at a word
+    boundary."""
+    shift_0, shift_1, shift_2, shift_3 = _LANE_SHIFTS[offset % 4]
+    return (
+        (sum(data[0::4]) << shift_0)
+        + (sum(data[1::4]) << shift_1)
+        + (sum(data[2::4]) << shift_2)
+        + (sum(data[3::4]) << shift_3)
+    )
+
+
+class Crc32:
+    """CRC-32 calculator with the same interface as the :py:class:`crcmod.predefined.PredefinedCrc`
+    calculators. It uses :py:func:`zlib.crc32`, which is considerably faster than crcmod."""
+
+    def __init__(self, crc_value: int = 0):
+        self.crc_value = crc_value
+
+    def update(self, data: bytes | bytearray | memoryview) -> None:
+        self.crc_value = zlib.crc32(data, self.crc_value)
+
+    def digest(self) -> bytes:
+        return self.crc_value.to_bytes(4, byteorder="big")
+
+
+# Creating a crcmod calculator by name generates its CRC table, which takes far longer than the
+# checksum calculation for small files. Calculators are created from this template instead.
+_CRC32C_TEMPLATE = PredefinedCrc("crc32c")
+# Factories for the CRC calculators of all supported CRC checksum types.
+_CRC_CALCULATOR_FACTORIES: dict[ChecksumType, Callable[[], Crc32 | Crc]] = {
+    ChecksumType.CRC_32: Crc32,
+    ChecksumType.CRC_32C: _CRC32C_TEMPLATE.new,
+}
 
-    with open(file_path, "rb") as file:
-        while True:
-            data = file.read(4)
-            if not data:
-                break
-            checksum += int.from_bytes(data.ljust(4, b"\0"), byteorder="big", signed=False)
 
-    checksum %= 2**32
-    return struct.pack("!I", checksum)
+def generate_crc_calculator(checksum_type: ChecksumType) -> Crc32 | Crc | None:
+    """Creates a new CRC calculator for the given checksum type, or returns None if the checksum
+    type is not a supported CRC checksum type."""
+    crc_calculator_factory = _CRC_CALCULATOR_FACTORIES.get(checksum_type)
+    if crc_calculator_factory is None:
+        return None
+    return crc_calculator_factory()
@@ -25,7 +25,18 @@ class CfdpIndication(enum.Enum):
     EOF_RECV = 10
 
 
-class CfdpState(enum.Enum):
+class NamedIntEnum(enum.IntEnum):
+    """Integer enumeration which is printed and formatted like a regular enumeration, for example
+    as ``CfdpState.IDLE``, on all Python versions."""
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__}.{self.name}"
+
+    def __format__(self, format_spec: str) -> str:
+        return str(self).__format__(format_spec)
+
+
+class CfdpState(NamedIntEnum):
     IDLE = 0
     BUSY = 1
     SUSPENDED = 2
@@ -3,28 +3,85 @@
 from __future__ import annotations  # Python 3.9 compatibility for | syntax
 
 import abc
+import errno
 import logging
+import mmap
 import os
-import platform
 import shutil
-import subprocess
+import stat
+from collections import deque
+from datetime import datetime, timezone
 from typing import TYPE_CHECKING, BinaryIO
 
-from crcmod.predefined import PredefinedCrc
 from spacepackets.cfdp.defs import NULL_CHECKSUM_U32, ChecksumType
 from spacepackets.cfdp.tlv import FilestoreResponseStatusCode
 
-from cfdppy.crc import calc_modular_checksum
+from cfdppy.crc import calc_modular_checksum, generate_crc_calculator
 from cfdppy.exceptions import ChecksumNotImplemented
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
     from pathlib import Path
 
+    from crcmod import Crc
+
+    from cfdppy.crc import Crc32
+
 _LOGGER = logging.getLogger(__name__)
 
 FilestoreResult = FilestoreResponseStatusCode
 
 
+def _stat_or_none(path: Path) -> os.stat_result | None:
+    """Retrieves the status of a path with a single system call, or None if it does not exist."""
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+
+def _create_new_file(file: Path) -> None:
+    """Creates a new empty file with a single system call, raising a FileExistsError if the file
+    already exists."""
+    os.close(os.open(file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666))
+
+
+def _move_file(
+    rename_function: Callable[[Path, Path], None], source_file: Path, target_file: Path
+) -> None:
+    """Moves a file with the provided rename function. Renaming is not possible across file
+    systems, so the file is copied and the source file is removed in that case."""
+    try:
+        rename_function(source_file, target_file)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(source_file, target_file)
+
+
+def _list_directory_lines(dir_name: Path, recursive: bool) -> list[str]:
+    """Lists the entries of a directory similarly to ``ls -al``. The status of the entries is
+    retrieved by :py:func:`os.scandir`, so no additional process is required. Entries of
+    subdirectories are listed with their path relative to the listed directory."""
+    lines = []
+    dirs_to_list = deque([(dir_name, "")])
+    while dirs_to_list:
+        current_dir, prefix = dirs_to_list.popleft()
+        with os.scandir(current_dir) as entries:
+            for entry in sorted(entries, key=lambda dir_entry: dir_entry.name):
+                entry_stat = entry.stat(follow_symlinks=False)
+                modified = datetime.fromtimestamp(entry_stat.st_mtime, tz=timezone.utc).strftime(
+                    "%Y-%m-%d %H:%M UTC"
+                )
+                lines.append(
+                    f"{stat.filemode(entry_stat.st_mode)} {entry_stat.st_size:>10} {modified} "
+                    f"{prefix}{entry.name}\n"
+                )
+                if recursive and stat.S_ISDIR(entry_stat.st_mode):
+                    dirs_to_list.append((entry.path, f"{prefix}{entry.name}/"))
+    return lines
+
+
 class VirtualFilestore(abc.ABC):
     """Interface for a virtual filestore implementation."""
 
@@ -172,6 +229,10 @@ class VirtualFilestore(abc.ABC):
         size_to_verify: int,
         segment_len: int = 4096,
     ) -> bool:
+        if checksum_type == ChecksumType.NULL_CHECKSUM:
+            # Like in the destination handler, the null checksum is not verified, so the file
+            # does not need to be accessed.
+            return True
         return (
             self.calculate_checksum(checksum_type, file_path, size_to_verify, segment_len)
             == checksum
@@ -183,40 +244,50 @@ class NativeFilestore(VirtualFilestore):
         pass
 
     def read_data(self, file: Path, offset: int | None, read_len: int | None = None) -> bytes:
-        if not file.exists():
-            raise FileNotFoundError(file)
-        file_size = self.file_size(file)
-        if read_len is None:
-            read_len = file_size
         if offset is None:
             offset = 0
-        with open(file, "rb") as rf:
+        # Opening the file raises a FileNotFoundError if it does not exist. The file is only read
+        # once, so it is read without an additional buffered reader.
+        with open(file, "rb", buffering=0) as rf:
             rf.seek(offset)
+            # Reads the rest of the file if no read length is specified.
             return rf.read(read_len)
 
     def file_size(self, file: Path) -> int:
-        if not file.exists():
-            raise FileNotFoundError(file)
-        return file.stat().st_size
+        # Raises a FileNotFoundError if the file does not exist.
+        return os.stat(file).st_size
 
     def read_from_opened_file(self, bytes_io: BinaryIO, offset: int, read_len: int) -> bytes:
         bytes_io.seek(offset)
         return bytes_io.read(read_len)
 
+    def read_into_opened_file(
+        self, bytes_io: BinaryIO, offset: int, buffer: bytearray | memoryview
+    ) -> int:
+        """Read data from an already opened file object into a provided buffer. This avoids
+        creating a new bytes object for each read operation.
+
+        :param bytes_io: File object
+        :param offset: Offset to read from
+        :param buffer: Buffer to read into. Its length determines the maximum number of bytes read.
+        :return: The number of bytes read
+        """
+        bytes_io.seek(offset)
+        return bytes_io.readinto(buffer)
+
     def file_exists(self, path: Path) -> bool:
-        return path.exists()
+        return os.path.exists(path)
 
     def is_directory(self, path: Path) -> bool:
-        return path.is_dir()
+        return os.path.isdir(path)
 
     def filename_from_full_path(self, path: Path) -> str | None:
         return path.name
 
     def truncate_file(self, file: Path) -> None:
-        if not file.exists():
-            raise FileNotFoundError(file)
-        with open(file, "w"):
-            pass
+        # Opening the file for updating raises a FileNotFoundError if it does not exist.
+        with open(file, "r+b") as of:
+            of.truncate()
 
     def write_data(self, file: Path, data: bytes, offset: int | None) -> None:
         """Primary function used to perform the CFDP Copy Procedure. This will also create a new
@@ -225,65 +296,80 @@ class NativeFilestore(VirtualFilestore):
         :return:
         :raises FileNotFoundError: File not found
         """
-        if not file.exists():
-            raise FileNotFoundError(file)
-        with open(file, "r+b") as of:
+        # Opening the file for updating raises a FileNotFoundError if it does not exist. The data
+        # is written once, so it is written without an additional buffered writer.
+        with open(file, "r+b", buffering=0) as of:
             if offset is not None:
                 of.seek(offset)
-            of.write(data)
+            data_view = memoryview(data)
+            # Unbuffered writes might be partial.
+            while data_view:
+                data_view = data_view[of.write(data_view) :]
 
     def create_file(self, file: Path) -> FilestoreResponseStatusCode:
         """Returns CREATE_NOT_ALLOWED if the file already exists"""
-        if file.exists():
-            _LOGGER.warning("File already exists")
-            return FilestoreResponseStatusCode.CREATE_NOT_ALLOWED
         try:
-            # Creates subfolders if they do not exist
-            file.parent.mkdir(exist_ok=True, parents=True)
-            with open(file, "x"):
-                pass
+            try:
+                _create_new_file(file)
+            except FileNotFoundError:
+                # Creates subfolders if they do not exist
+                os.makedirs(os.path.dirname(file), exist_ok=True)
+                _create_new_file(file)
             return FilestoreResponseStatusCode.CREATE_SUCCESS
+        except FileExistsError:
+            _LOGGER.warning("File already exists")
+            return FilestoreResponseStatusCode.CREATE_NOT_ALLOWED
         except OSError:
             _LOGGER.exception(f"Creating file {file} failed")
             return FilestoreResponseStatusCode.CREATE_NOT_ALLOWED
 
     def delete_file(self, file: Path) -> FilestoreResponseStatusCode:
-        if not file.exists():
+        file_stat = _stat_or_none(file)
+        if file_stat is None:
             return FilestoreResponseStatusCode.DELETE_FILE_DOES_NOT_EXIST
-        if file.is_dir():
+        if stat.S_ISDIR(file_stat.st_mode):
             return FilestoreResponseStatusCode.DELETE_NOT_ALLOWED
         os.remove(file)
         return FilestoreResponseStatusCode.DELETE_SUCCESS
 
     def rename_file(self, old_file: Path, new_file: Path) -> FilestoreResponseStatusCode:
-        if old_file.is_dir() or new_file.is_dir():
+        old_file_stat = _stat_or_none(old_file)
+        new_file_stat = _stat_or_none(new_file)
+        if (old_file_stat is not None and stat.S_ISDIR(old_file_stat.st_mode)) or (
+            new_file_stat is not None and stat.S_ISDIR(new_file_stat.st_mode)
+        ):
             _LOGGER.exception(f"{old_file} or {new_file} is a directory")
             return FilestoreResponseStatusCode.RENAME_NOT_PERFORMED
-        if not old_file.exists():
+        if old_file_stat is None:
             return FilestoreResponseStatusCode.RENAME_OLD_FILE_DOES_NOT_EXIST
-        if new_file.exists():
+        if new_file_stat is not None:
             return FilestoreResponseStatusCode.RENAME_NEW_FILE_DOES_EXIST
-        old_file.rename(new_file)
+        _move_file(os.rename, old_file, new_file)
         return FilestoreResponseStatusCode.RENAME_SUCCESS
 
     def replace_file(self, replaced_file: Path, source_file: Path) -> FilestoreResponseStatusCode:
-        if replaced_file.is_dir() or source_file.is_dir():
+        replaced_file_stat = _stat_or_none(replaced_file)
+        source_file_stat = _stat_or_none(source_file)
+        if (replaced_file_stat is not None and stat.S_ISDIR(replaced_file_stat.st_mode)) or (
+            source_file_stat is not None and stat.S_ISDIR(source_file_stat.st_mode)
+        ):
             _LOGGER.warning(f"{replaced_file} is a directory")
             return FilestoreResponseStatusCode.REPLACE_NOT_ALLOWED
-        if not replaced_file.exists():
+        if replaced_file_stat is None:
             return FilestoreResponseStatusCode.REPLACE_FILE_NAME_ONE_TO_BE_REPLACED_DOES_NOT_EXIST
-        if not source_file.exists():
+        if source_file_stat is None:
             return FilestoreResponseStatusCode.REPLACE_FILE_NAME_TWO_REPLACE_SOURCE_NOT_EXIST
-        source_file.replace(replaced_file)
+        _move_file(os.replace, source_file, replaced_file)
         return FilestoreResponseStatusCode.REPLACE_SUCCESS
 
     def remove_directory(
         self, dir_name: Path, recursive: bool = False
     ) -> FilestoreResponseStatusCode:
-        if not dir_name.exists():
+        dir_stat = _stat_or_none(dir_name)
+        if dir_stat is None:
             _LOGGER.warning(f"{dir_name} does not exist")
             return FilestoreResponseStatusCode.REMOVE_DIR_DOES_NOT_EXIST
-        if not dir_name.is_dir():
+        if not stat.S_ISDIR(dir_stat.st_mode):
             _LOGGER.warning(f"{dir_name} is not a directory")
             return FilestoreResponseStatusCode.REMOVE_DIR_NOT_ALLOWED
         if recursive:
@@ -297,10 +383,11 @@ class NativeFilestore(VirtualFilestore):
             return FilestoreResponseStatusCode.RENAME_NOT_PERFORMED
 
     def create_directory(self, dir_name: Path) -> FilestoreResponseStatusCode:
-        if dir_name.exists():
+        try:
+            os.mkdir(dir_name)
+        except FileExistsError:
             # It does not really matter if the existing structure is a file or a directory
             return FilestoreResponseStatusCode.CREATE_DIR_CAN_NOT_BE_CREATED
-        os.mkdir(dir_name)
         return FilestoreResponseStatusCode.CREATE_DIR_SUCCESS
 
     def list_directory(
@@ -310,40 +397,24 @@ class NativeFilestore(VirtualFilestore):
 
         :param dir_name: Name of directory to list
         :param target_file: The list will be written into this target file
-        :param recursive:
+        :param recursive: List the contents of all subdirectories as well
         :return:
         """
-        if not dir_name.exists() or not dir_name.is_dir():
+        dir_stat = _stat_or_none(dir_name)
+        if dir_stat is None or not stat.S_ISDIR(dir_stat.st_mode):
             _LOGGER.warning(f"{dir_name} does not exist or is not a directory")
             return FilestoreResponseStatusCode.NOT_PERFORMED
 
-        if platform.system() == "Linux" or platform.system() == "Darwin":
-            cmd = ["ls", "-al"]
-        elif platform.system() == "Windows":
-            cmd = ["dir"]
-        else:
-            _LOGGER.warning(f"Unknown OS {platform.system()}, do not know how to list directory")
+        try:
+            lines = _list_directory_lines(dir_name, recursive)
+        except OSError as e:
+            _LOGGER.error(f"Failed to list directory {dir_name}: {e}")
             return FilestoreResponseStatusCode.NOT_PERFORMED
-
-        open_flag = "a" if target_file.exists() else "w"
-        with open(target_file, open_flag) as of:
-            of.write(f"Contents of directory {dir_name} generated with '{cmd}':\n")
-            try:
-                # cmd is not modified by user input and dir_name has been checked above
-                result = subprocess.run(cmd, check=True, capture_output=True, cwd=dir_name)  # noqa S603
-            except (subprocess.CalledProcessError, OSError) as e:
-                _LOGGER.error(f"Failed to list directory {dir_name}: {e}")
-                return FilestoreResponseStatusCode.NOT_PERFORMED
-            of.write(result.stdout.decode())
+        with open(target_file, "a") as of:
+            of.write(f"Contents of directory {dir_name}:\n")
+            of.writelines(lines)
         return FilestoreResponseStatusCode.SUCCESS
 
-    def _verify_checksum(self, checksum_type: ChecksumType) -> None:
-        if checksum_type not in [
-            ChecksumType.CRC_32,
-            ChecksumType.CRC_32C,
-        ]:
-            raise ChecksumNotImplemented(checksum_type)
-
     def checksum_type_to_crcmod_str(self, checksum_type: ChecksumType) -> str | None:
         if checksum_type == ChecksumType.CRC_32:
             return "crc32"
@@ -351,9 +422,11 @@ class NativeFilestore(VirtualFilestore):
             return "crc32c"
         raise ChecksumNotImplemented(checksum_type)
 
-    def _generate_crc_calculator(self, checksum_type: ChecksumType) -> PredefinedCrc:
-        self._verify_checksum(checksum_type)
-        return PredefinedCrc(self.checksum_type_to_crcmod_str(checksum_type))
+    def _generate_crc_calculator(self, checksum_type: ChecksumType) -> Crc32 | Crc:
+        crc_calculator = generate_crc_calculator(checksum_type)
+        if crc_calculator is None:
+            raise ChecksumNotImplemented(checksum_type)
+        return crc_calculator
 
     def calculate_checksum(
         self,
@@ -364,22 +437,49 @@ class NativeFilestore(VirtualFilestore):
     ) -> bytes:
         if checksum_type == ChecksumType.NULL_CHECKSUM:
             return NULL_CHECKSUM_U32
-        if not file_path.exists():
-            raise FileNotFoundError(file_path)
+        # Opening the file raises a FileNotFoundError if it does not exist.
         if checksum_type == ChecksumType.MODULAR:
             return calc_modular_checksum(file_path)
         if segment_len == 0:
             raise ValueError("segment length can not be 0")
         crc_obj = self._generate_crc_calculator(checksum_type)
-        current_offset = 0
-        # Calculate the file CRC
         with open(file_path, "rb") as file:
-            while current_offset < size_to_verify:
-                read_len = min(segment_len, size_to_verify - current_offset)
-                if read_len > 0:
-                    crc_obj.update(self.read_from_opened_file(file, current_offset, read_len))
-                current_offset += read_len
-            return crc_obj.digest()
+            size_to_verify = min(size_to_verify, os.fstat(file.fileno()).st_size)
+            if size_to_verify == 0:
+                # Empty files can not be memory-mapped.
+                return crc_obj.digest()
+            try:
+                mapped_file = mmap.mmap(file.fileno(), size_to_verify, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                # Not every file can be memory-mapped, so read it segment-wise in that case.
+                self._update_crc_from_opened_file(crc_obj, file, size_to_verify, segment_len)
+                return crc_obj.digest()
+            # The whole file is passed to the CRC calculator at once, so there is no read call and
+            # no bytes object for each segment.
+            with mapped_file:
+                if hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mapped_file.madvise(mmap.MADV_SEQUENTIAL)
+                with memoryview(mapped_file) as mapped_view:
+                    crc_obj.update(mapped_view)
+        return crc_obj.digest()
+
+    def _update_crc_from_opened_file(
+        self,
+        crc_obj: Crc32 | Crc,
+        file: BinaryIO,
+        size_to_verify: int,
+        segment_len: int,
+    ) -> None:
+        # The same buffer is re-used for all segments.
+        segment_view = memoryview(bytearray(min(segment_len, size_to_verify)))
+        current_offset = 0
+        while current_offset < size_to_verify:
+            read_len = min(segment_len, size_to_verify - current_offset)
+            read_len = self.read_into_opened_file(file, current_offset, segment_view[:read_len])
+            if read_len == 0:
+                break
+            crc_obj.update(segment_view[:read_len])
+            current_offset += read_len
 
 
 HostFilestore = NativeFilestore
@@ -10,6 +10,15 @@ from spacepackets.cfdp.pdu import PduHolder
 if TYPE_CHECKING:
     from spacepackets.countdown import Countdown
 
+# Membership tests against these sets avoid building a tuple of enumeration members, which are
+# slow to look up, for each routed packet.
+_DEST_HANDLER_DIRECTIVES = frozenset(
+    (DirectiveType.METADATA_PDU, DirectiveType.EOF_PDU, DirectiveType.PROMPT_PDU)
+)
+_SOURCE_HANDLER_DIRECTIVES = frozenset(
+    (DirectiveType.FINISHED_PDU, DirectiveType.NAK_PDU, DirectiveType.KEEP_ALIVE_PDU)
+)
+
 
 class PacketDestination(enum.Enum):
     SOURCE_HANDLER = 0
@@ -28,23 +37,16 @@ def get_packet_destination(packet: GenericPduPacket) -> PacketDestination:
     """
     if packet.pdu_type == PduType.FILE_DATA:
         return PacketDestination.DEST_HANDLER
-    if packet.directive_type in [  # type: ignore
-        DirectiveType.METADATA_PDU,
-        DirectiveType.EOF_PDU,
-        DirectiveType.PROMPT_PDU,
-    ]:
+    directive_type = packet.directive_type  # type: ignore
+    if directive_type in _DEST_HANDLER_DIRECTIVES:
         # Section b) of 4.5.3: These PDUs should always be targeted towards the file
         # receiver a.k.a. the destination handler
         return PacketDestination.DEST_HANDLER
-    if packet.directive_type in [  # type: ignore
-        DirectiveType.FINISHED_PDU,
-        DirectiveType.NAK_PDU,
-        DirectiveType.KEEP_ALIVE_PDU,
-    ]:
+    if directive_type in _SOURCE_HANDLER_DIRECTIVES:
         # Section c) of 4.5.3: These PDUs should always be targeted towards the file sender
         # a.k.a. the source handler
         return PacketDestination.SOURCE_HANDLER
-    if packet.directive_type == DirectiveType.ACK_PDU:  # type: ignore
+    if directive_type == DirectiveType.ACK_PDU:
         # Section a): Recipient depends on the type of PDU that is being acknowledged.
         # We can simply extract the PDU type from the raw stream. If it is an EOF PDU,
         # this packet is passed to the source handler. For a finished PDU, it is
@@ -55,7 +57,7 @@ def get_packet_destination(packet: GenericPduPacket) -> PacketDestination:
             return PacketDestination.SOURCE_HANDLER
         if ack_pdu.directive_code_of_acked_pdu == DirectiveType.FINISHED_PDU:
             return PacketDestination.DEST_HANDLER
-    raise ValueError(f"unexpected directive type {packet.directive_type}")  # type: ignore
+    raise ValueError(f"unexpected directive type {directive_type}")
 
 
 @dataclass
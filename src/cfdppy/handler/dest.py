@@ -2,6 +2,7 @@ from __future__ import annotations  # Python 3.9 compatibility for | syntax
 
 import enum
 import logging
+from bisect import bisect_left, bisect_right, insort
 from collections import deque
 from dataclasses import dataclass, field
 from pathlib import Path
@@ -35,7 +36,8 @@ from spacepackets.cfdp.pdu.nak import get_max_seg_reqs_for_max_packet_size_and_p
 from spacepackets.cfdp.tlv import MessageToUserTlv
 from spacepackets.countdown import Countdown
 
-from cfdppy.defs import CfdpState
+from cfdppy.crc import generate_crc_calculator
+from cfdppy.defs import CfdpState, NamedIntEnum
 from cfdppy.exceptions import (
     InvalidDestinationId,
     InvalidPduDirection,
@@ -68,10 +70,20 @@ from cfdppy.user import (
 )
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from crcmod import Crc
     from spacepackets.util import UnsignedByteField
 
+    from cfdppy.crc import Crc32
+
 _LOGGER = logging.getLogger(__name__)
 
+# Paths are immutable, so all empty file parameters can share the same path instance.
+_EMPTY_PATH = Path()
+# Directive PDUs which are ignored in unacknowledged mode.
+_ACKED_MODE_DIRECTIVES = frozenset((DirectiveType.ACK_PDU, DirectiveType.PROMPT_PDU))
+
 
 class CompletionDisposition(enum.Enum):
     COMPLETED = 0
@@ -90,18 +102,18 @@ class _DestFileParams(_FileParamsBase):
             segment_len=0,
             crc32=b"",
             file_size=None,
-            file_name=Path(),
+            file_name=_EMPTY_PATH,
             file_size_eof=None,
             metadata_only=False,
         )
 
     def reset(self) -> None:
         super().reset()
-        self.file_name = Path()
+        self.file_name = _EMPTY_PATH
         self.file_size_eof = None
 
 
-class TransactionStep(enum.Enum):
+class TransactionStep(NamedIntEnum):
     IDLE = 0
     TRANSACTION_START = 1
     """Metadata was received, which triggered a transaction start."""
@@ -132,47 +144,81 @@ class DestStateWrapper:
     state: CfdpState = CfdpState.IDLE
     step: TransactionStep = TransactionStep.IDLE
     transaction_id: TransactionId | None = None
-    _num_packets_ready: int = 0
+    # The queue of the handler with the PDUs to be sent, which determines the number of packets
+    # which are ready.
+    _pdus_to_be_sent: deque[PduHolder] = field(default_factory=deque, repr=False, compare=False)
 
     @property
     def num_packets_ready(self) -> int:
-        return self._num_packets_ready
+        return len(self._pdus_to_be_sent)
 
     @property
     def packets_ready(self) -> bool:
-        return self.num_packets_ready > 0
+        return len(self._pdus_to_be_sent) > 0
 
 
 class LostSegmentTracker:
+    """Tracks the lost segments of a file transfer.
+
+    The start offsets of the lost segments are kept in a sorted list, so new segments are inserted
+    with a binary search instead of re-sorting all segments. The end offsets are stored in a
+    dictionary with the start offsets as keys."""
+
+    __slots__ = ("_seg_ends", "_seg_starts")
+
     def __init__(self):
-        self.lost_segments = {}
+        self._seg_starts: list[int] = []
+        self._seg_ends: dict[int, int] = {}
+
+    @property
+    def lost_segments(self) -> dict[int, int]:
+        """Dictionary of all lost segments with their start offset as key and their end offset as
+        value, sorted by the start offset."""
+        return {seg_start: self._seg_ends[seg_start] for seg_start in self._seg_starts}
 
     @property
     def num_lost_segments(self) -> int:
-        return len(self.lost_segments)
+        return len(self._seg_starts)
+
+    def segment_requests(self) -> list[tuple[int, int]]:
+        """List of all lost segments as start and end offset tuples, sorted by the start
+        offset."""
+        seg_ends = self._seg_ends
+        return [(seg_start, seg_ends[seg_start]) for seg_start in self._seg_starts]
 
     def reset(self) -> None:
-        self.lost_segments.clear()
+        self._seg_starts.clear()
+        self._seg_ends.clear()
 
     def add_lost_segment(self, lost_seg: tuple[int, int]) -> None:
-        self.lost_segments.update({lost_seg[0]: lost_seg[1]})
-        self.lost_segments = dict(sorted(self.lost_segments.items()))
+        if lost_seg[0] not in self._seg_ends:
+            # Lost segments are usually detected in ascending order, in which case this only
+            # appends the start offset.
+            insort(self._seg_starts, lost_seg[0])
+        self._seg_ends[lost_seg[0]] = lost_seg[1]
 
     def coalesce_lost_segments(self) -> None:
-        if len(self.lost_segments) <= 1:
+        """Merges adjacent and overlapping lost segments. The segments are merged in place: each
+        segment is either merged into the last kept segment or becomes the next kept segment,
+        and the start offsets list is truncated to the kept segments afterwards."""
+        if len(self._seg_starts) <= 1:
             return
-        merged_segments = []
-        current_start, current_end = next(iter(self.lost_segments.items()))
-
-        for seg_start, seg_end in self.lost_segments.items():
-            if seg_start == current_end:
-                current_end = seg_end
+        seg_starts = self._seg_starts
+        seg_ends = self._seg_ends
+        kept_idx = 0
+        kept_end = seg_ends[seg_starts[0]]
+        for idx in range(1, len(seg_starts)):
+            seg_start = seg_starts[idx]
+            seg_end = seg_ends.pop(seg_start)
+            if seg_start <= kept_end:
+                kept_end = max(kept_end, seg_end)
             else:
-                merged_segments.append((current_start, current_end))
-                current_start, current_end = seg_start, seg_end
-
-        merged_segments.append((current_start, current_end))
-        self.lost_segments = dict(merged_segments)
+                seg_ends[seg_starts[kept_idx]] = kept_end
+                kept_idx += 1
+                seg_starts[kept_idx] = seg_start
+                kept_end = seg_end
+        seg_ends[seg_starts[kept_idx]] = kept_end
+        del seg_starts[kept_idx + 1 :]
 
     def remove_lost_segment(self, segment_to_remove: tuple[int, int]) -> bool:
         """Please note that this method can only handle the removal of segments
@@ -182,55 +228,80 @@ class LostSegmentTracker:
         Returns
         ---------
 
-        Returns whether the internal dictionary was manipulated in any way.
+        Returns whether the lost segments were manipulated in any way.
         """
         if segment_to_remove[1] - segment_to_remove[0] == 0:
             return False
-        did_something = False
-        end = self.lost_segments.get(segment_to_remove[0])
+        end = self._seg_ends.get(segment_to_remove[0])
         if end is not None:
             if segment_to_remove[1] > end:
                 raise ValueError("Specified lost segment end exceeds existing lost segment end")
-            did_something = True
-            if segment_to_remove[1] == end:
-                self.lost_segments.pop(segment_to_remove[0])
-            elif segment_to_remove[1] < end:
-                self.lost_segments.pop(segment_to_remove[0])
+            self._seg_starts.pop(bisect_left(self._seg_starts, segment_to_remove[0]))
+            del self._seg_ends[segment_to_remove[0]]
+            if segment_to_remove[1] < end:
                 # Re-insert the rest of the missing segment
-                self.lost_segments.update({segment_to_remove[1]: end})
-        else:
-            for seg_start, seg_end in list(self.lost_segments.items()):
-                if seg_start < segment_to_remove[0] < seg_end:
-                    if segment_to_remove[1] > seg_end:
-                        raise ValueError(
-                            "Specified lost segment end exceeds existing lost segment end"
-                        )
-                    if segment_to_remove[1] == seg_end:
-                        self.lost_segments.update({seg_start: segment_to_remove[0]})
-                    else:
-                        self.lost_segments.update({seg_start: segment_to_remove[0]})
-                        self.lost_segments.update({segment_to_remove[1]: seg_end})
-                    did_something = True
-                    break
-        if did_something:
-            self.lost_segments = dict(sorted(self.lost_segments.items()))
-        return did_something
+                self.add_lost_segment((segment_to_remove[1], end))
+            return True
+        # The only lost segment which can contain the segment to remove is the last one starting
+        # before it.
+        seg_idx = bisect_right(self._seg_starts, segment_to_remove[0]) - 1
+        if seg_idx < 0:
+            return False
+        seg_start = self._seg_starts[seg_idx]
+        seg_end = self._seg_ends[seg_start]
+        if segment_to_remove[0] >= seg_end:
+            return False
+        if segment_to_remove[1] > seg_end:
+            raise ValueError("Specified lost segment end exceeds existing lost segment end")
+        self._seg_ends[seg_start] = segment_to_remove[0]
+        if segment_to_remove[1] < seg_end:
+            rest_end = self._seg_ends.get(segment_to_remove[1])
+            if rest_end is not None:
+                # A lost segment already starts where the rest of the lost segment starts.
+                self._seg_ends[segment_to_remove[1]] = max(rest_end, seg_end)
+            else:
+                # The rest of the lost segment directly follows the shortened segment.
+                self._seg_starts.insert(seg_idx + 1, segment_to_remove[1])
+                self._seg_ends[segment_to_remove[1]] = seg_end
+        return True
 
 
 @dataclass
 class _AckedModeParams:
-    lost_seg_tracker: LostSegmentTracker = field(default=LostSegmentTracker())
+    lost_seg_tracker: LostSegmentTracker = field(default_factory=LostSegmentTracker)
     metadata_missing: bool = False
     last_start_offset: int = 0
     last_end_offset: int = 0
     deferred_lost_segment_detection_active: bool = False
     procedure_timer: Countdown | None = None
     nak_activity_counter: int = 0
+    # Only depends on the PDU configuration and the remote configuration of the transaction.
+    max_segments_in_one_pdu: int | None = None
 
 
 class _DestFieldWrapper:
     """Private wrapper class for internal use only."""
 
+    __slots__ = (
+        "acked_params",
+        "check_timer",
+        "checksum_type",
+        "closure_requested",
+        "completion_disposition",
+        "crc_calculator",
+        "crc_progress",
+        "current_check_count",
+        "finished_params",
+        "fp",
+        "pdu_conf",
+        "positive_ack_params",
+        "remote_cfg",
+        "transaction_id",
+        "transmission_mode",
+        "write_buffer",
+        "write_buffer_offset",
+    )
+
     def __init__(self):
         self.transaction_id: TransactionId | None = None
         self.remote_cfg: RemoteEntityCfg | None = None
@@ -245,7 +316,16 @@ class _DestFieldWrapper:
         )
         self.completion_disposition: CompletionDisposition = CompletionDisposition.COMPLETED
         self.pdu_conf = PduConfig.empty()
+        # Cached transmission mode of the PDU configuration, which is checked for most PDUs.
+        self.transmission_mode: TransmissionMode = self.pdu_conf.trans_mode
         self.fp: _DestFileParams = _DestFileParams.empty()
+        # Data of consecutive file data PDUs which was not written to the file yet.
+        self.write_buffer = bytearray()
+        self.write_buffer_offset: int = 0
+        # Calculates the checksum from the data which was written consecutively from the start of
+        # the file. It is None if the checksum needs to be calculated from the file instead.
+        self.crc_calculator: Crc32 | Crc | None = None
+        self.crc_progress: int = 0
 
         self.acked_params = _AckedModeParams()
         self.positive_ack_params = _PositiveAckProcedureParams()
@@ -321,11 +401,12 @@ class DestHandler:
     ) -> None:
         self.cfg = cfg
         self.remote_cfg_table = remote_cfg_table
-        self.states = DestStateWrapper()
+        self._pdus_to_be_sent: deque[PduHolder] = deque()
+        self.states = DestStateWrapper(_pdus_to_be_sent=self._pdus_to_be_sent)
         self.user = user
         self.check_timer_provider = check_timer_provider
         self._params = _DestFieldWrapper()
-        self._pdus_to_be_sent: deque[PduHolder] = deque()
+        self._step_handlers = self._build_step_handlers()
 
     @property
     def entity_id(self) -> UnsignedByteField:
@@ -341,7 +422,7 @@ class DestHandler:
     def transmission_mode(self) -> TransmissionMode | None:
         if self.states.state == CfdpState.IDLE:
             return None
-        return self._params.pdu_conf.trans_mode
+        return self._params.transmission_mode
 
     @property
     def progress(self) -> int:
@@ -422,11 +503,13 @@ class DestHandler:
             self._check_inserted_packet(packet)
         if self.states.state == CfdpState.IDLE:
             self.__idle_fsm(packet)
-            # Calling the FSM immediately would lead to an exception, user must send any PDUs which
-            # might have been generated (e.g. NAK PDUs to re-request metadata) first.
-            if self.packets_ready:
+            # There is nothing left to do if no transaction was started. Otherwise, calling the
+            # FSM immediately would lead to an exception, user must send any PDUs which might have
+            # been generated (e.g. NAK PDUs to re-request metadata) first.
+            if self.states.state == CfdpState.IDLE or self.packets_ready:
                 return FsmResult(self.states)
-        if self.states.state == CfdpState.BUSY:
+            self.__non_idle_fsm(packet)
+        elif self.states.state == CfdpState.BUSY:
             self.__non_idle_fsm(packet)
         return FsmResult(self.states)
 
@@ -436,17 +519,20 @@ class DestHandler:
         if packet.dest_entity_id.value != self.cfg.local_entity_id.value:
             raise InvalidDestinationId(self.cfg.local_entity_id, packet.dest_entity_id)
         if self.remote_cfg_table.get_cfg(packet.source_entity_id) is None:
-            raise NoRemoteEntityCfgFound(entity_id=packet.dest_entity_id)
+            raise NoRemoteEntityCfgFound(entity_id=packet.source_entity_id)
+        if packet.pdu_type == PduType.FILE_DATA:
+            # File data PDUs are the most common PDUs. They are always routed to the destination
+            # handler and not ignored in any mode, so the directive checks can be skipped.
+            if self.states.state == CfdpState.IDLE:
+                self._handle_first_packet_not_metadata_pdu(packet)
+            return
+        directive_type = packet.directive_type  # type: ignore
         if get_packet_destination(packet) == PacketDestination.SOURCE_HANDLER:
             raise InvalidPduForDestHandler(packet)
-        if (self.states.state == CfdpState.IDLE) and (
-            packet.pdu_type == PduType.FILE_DATA
-            or packet.directive_type != DirectiveType.METADATA_PDU  # type: ignore
-        ):
+        if self.states.state == CfdpState.IDLE and directive_type != DirectiveType.METADATA_PDU:
             self._handle_first_packet_not_metadata_pdu(packet)
-        if packet.pdu_type == PduType.FILE_DIRECTIVE and (
-            packet.directive_type  # type: ignore
-            in [DirectiveType.ACK_PDU, DirectiveType.PROMPT_PDU]
+        if (
+            directive_type in _ACKED_MODE_DIRECTIVES
             and self.states.state == CfdpState.BUSY
             and self.transmission_mode == TransmissionMode.UNACKNOWLEDGED
         ):
@@ -456,10 +542,20 @@ class DestHandler:
 
     def get_next_packet(self) -> PduHolder | None:
         """Retrieve the next packet which should be sent to the remote CFDP source entity."""
-        if len(self._pdus_to_be_sent) == 0:
-            return None
-        self.states._num_packets_ready -= 1
-        return self._pdus_to_be_sent.popleft()
+        if self._pdus_to_be_sent:
+            return self._pdus_to_be_sent.popleft()
+        return None
+
+    def get_next_packets(self, max_num_packets: int | None = None) -> list[PduHolder]:
+        """Retrieve the next packets which should be sent to the remote CFDP source entity
+        with one call. All packets are retrieved if ``max_num_packets`` is None. This is
+        useful for transports which can send multiple packets at once."""
+        pdus_to_be_sent = self._pdus_to_be_sent
+        if max_num_packets is None or max_num_packets >= len(pdus_to_be_sent):
+            packets = list(pdus_to_be_sent)
+            pdus_to_be_sent.clear()
+            return packets
+        return [pdus_to_be_sent.popleft() for _ in range(max_num_packets)]
 
     def cancel_request(self, transaction_id: TransactionId) -> bool:
         """This function models the Cancel.request CFDP primtive and is the recommended way
@@ -526,33 +622,62 @@ class DestHandler:
     def __non_idle_fsm(self, packet: GenericPduPacket | None) -> None:
         self._fsm_advancement_after_packets_were_sent()
         pdu_holder = PduHolder(packet)
-        if (
-            self.states.step
-            in [
-                TransactionStep.RECEIVING_FILE_DATA,
-                TransactionStep.RECV_FILE_DATA_WITH_CHECK_LIMIT_HANDLING,
-            ]
-            and packet is not None
-        ):
+        # Step handlers with a lower position than the last called one are skipped, so a step
+        # handler is only called if its step was reached in this state machine call.
+        next_position = 0
+        while True:
+            step_handler = None
+            for position, handler in self._step_handlers.get(self.states.step, ()):
+                if position >= next_position:
+                    step_handler = handler
+                    next_position = position + 1
+                    break
+            if step_handler is None:
+                return
+            step_handler(pdu_holder)
+
+    def _build_step_handlers(
+        self,
+    ) -> dict[TransactionStep, tuple[tuple[int, Callable[[PduHolder], None]], ...]]:
+        """Builds the table of the step handlers of the non-IDLE state machine. The handlers of
+        each step are listed with their position in the order in which the state machine calls the
+        handlers. A step handler may advance the transaction to a step whose handler is called
+        in the same state machine call."""
+        return {
+            TransactionStep.RECEIVING_FILE_DATA: ((0, self._file_data_step_handler),),
+            TransactionStep.WAITING_FOR_METADATA: ((1, self._waiting_for_metadata_step_handler),),
+            TransactionStep.RECV_FILE_DATA_WITH_CHECK_LIMIT_HANDLING: (
+                (0, self._file_data_step_handler),
+                (2, lambda _: self._check_limit_handling()),
+            ),
+            TransactionStep.WAITING_FOR_MISSING_DATA: (
+                (3, self._waiting_for_missing_data_step_handler),
+            ),
+            TransactionStep.TRANSFER_COMPLETION: (
+                (4, lambda _: self._handle_transfer_completion()),
+            ),
+            TransactionStep.SENDING_FINISHED_PDU: ((5, self._sending_finished_pdu_step_handler),),
+            TransactionStep.WAITING_FOR_FINISHED_ACK: ((6, self._handle_waiting_for_finished_ack),),
+        }
+
+    def _file_data_step_handler(self, pdu_holder: PduHolder) -> None:
+        if pdu_holder.pdu is not None:
             self._handle_fd_or_eof_pdu(pdu_holder)
-        if self.states.step == TransactionStep.WAITING_FOR_METADATA:
-            self._handle_waiting_for_missing_metadata(pdu_holder)
-            self._deferred_lost_segment_handling()
-        if self.states.step == TransactionStep.RECV_FILE_DATA_WITH_CHECK_LIMIT_HANDLING:
-            self._check_limit_handling()
-        if self.states.step == TransactionStep.WAITING_FOR_MISSING_DATA:
-            if packet is not None and pdu_holder.pdu_type == PduType.FILE_DATA:
-                self._handle_fd_pdu(pdu_holder.to_file_data_pdu())
-                if self._params.acked_params.deferred_lost_segment_detection_active:
-                    self._reset_nak_activity_parameters()
-            self._deferred_lost_segment_handling()
-        if self.states.step == TransactionStep.TRANSFER_COMPLETION:
-            self._handle_transfer_completion()
-        if self.states.step == TransactionStep.SENDING_FINISHED_PDU:
-            self._prepare_finished_pdu()
-            self._handle_finished_pdu_sent()
-        if self.states.step == TransactionStep.WAITING_FOR_FINISHED_ACK:
-            self._handle_waiting_for_finished_ack(pdu_holder)
+
+    def _waiting_for_metadata_step_handler(self, pdu_holder: PduHolder) -> None:
+        self._handle_waiting_for_missing_metadata(pdu_holder)
+        self._deferred_lost_segment_handling()
+
+    def _waiting_for_missing_data_step_handler(self, pdu_holder: PduHolder) -> None:
+        if pdu_holder.pdu is not None and pdu_holder.pdu_type == PduType.FILE_DATA:
+            self._handle_fd_pdu(pdu_holder.to_file_data_pdu())
+            if self._params.acked_params.deferred_lost_segment_detection_active:
+                self._reset_nak_activity_parameters()
+        self._deferred_lost_segment_handling()
+
+    def _sending_finished_pdu_step_handler(self, _pdu_holder: PduHolder) -> None:
+        self._prepare_finished_pdu()
+        self._handle_finished_pdu_sent()
 
     def _fsm_advancement_after_packets_were_sent(self) -> None:
         """Advance the internal FSM after all packets to be sent were retrieved from the handler."""
@@ -675,6 +800,7 @@ class DestHandler:
         self.states.state = CfdpState.BUSY
         self._params.pdu_conf = pdu.pdu_header.pdu_conf
         self._params.pdu_conf.direction = Direction.TOWARDS_SENDER
+        self._params.transmission_mode = self._params.pdu_conf.trans_mode
         self._params.transaction_id = TransactionId(
             source_entity_id=pdu.source_entity_id,
             transaction_seq_num=pdu.transaction_seq_num,
@@ -702,6 +828,7 @@ class DestHandler:
             )
             raise NoRemoteEntityCfgFound(metadata_pdu.dest_entity_id)
         if not self._params.fp.metadata_only:
+            self._params.crc_calculator = generate_crc_calculator(self._params.checksum_type)
             self.states.step = TransactionStep.RECEIVING_FILE_DATA
             self._init_vfs_handling(Path(metadata_pdu.source_file_name).name)  # type: ignore
         else:
@@ -815,44 +942,82 @@ class DestHandler:
 
     def _handle_fd_pdu(self, file_data_pdu: FileDataPdu) -> None:
         data = file_data_pdu.file_data
+        data_len = len(data)
         offset = file_data_pdu.offset
         if self.cfg.indication_cfg.file_segment_recvd_indication_required:
             file_segment_indic_params = FileSegmentRecvdParams(
                 transaction_id=self._params.transaction_id,  # type: ignore
-                length=len(file_data_pdu.file_data),
+                length=data_len,
                 offset=offset,
                 segment_metadata=file_data_pdu.segment_metadata,
             )
             self.user.file_segment_recv_indication(file_segment_indic_params)
+        next_expected_progress = offset + data_len
+        if self._params.transmission_mode == TransmissionMode.ACKNOWLEDGED:
+            self._lost_segment_handling(offset, data_len)
+        if not self._buffer_file_data(data, offset):
+            return
+        fp = self._params.fp
+        if (
+            fp.file_size_eof is not None
+            and (next_expected_progress > fp.file_size_eof)
+            and (
+                self._declare_fault(ConditionCode.FILE_SIZE_ERROR) != FaultHandlerCode.IGNORE_ERROR
+            )
+        ):
+            # CFDP 4.6.1.2.7 c): If the sum of the FD PDU offset and segment size exceeds
+            # the file size indicated in the first previously received EOF (No Error) PDU, if
+            # any, then a File Size Error fault shall be declared.
+            return
+        # Ensure that the progress value is always incremented
+        fp.progress = max(next_expected_progress, fp.progress)
+
+    def _buffer_file_data(self, data: bytes, offset: int) -> bool:
+        """Appends the file data to the write buffer if it directly follows the buffered data.
+        The buffer is written to the file once it reaches the configured flush threshold.
+        Returns whether no write error occurred."""
+        write_buffer = self._params.write_buffer
+        if write_buffer and offset != self._params.write_buffer_offset + len(write_buffer):
+            if not self._flush_file_data():
+                return False
+            write_buffer = self._params.write_buffer
+        flush_threshold = self.cfg.file_data_flush_threshold
+        if not write_buffer:
+            if len(data) >= flush_threshold:
+                return self._write_file_data(data, offset)
+            self._params.write_buffer_offset = offset
+        write_buffer += data
+        if len(write_buffer) >= flush_threshold:
+            return self._flush_file_data()
+        return True
+
+    def _flush_file_data(self) -> bool:
+        """Writes all buffered file data to the file. Returns whether no write error occurred."""
+        write_buffer = self._params.write_buffer
+        if not write_buffer:
+            return True
+        # The filestore might keep a reference to the written data, so the buffer is not re-used.
+        self._params.write_buffer = bytearray()
+        return self._write_file_data(write_buffer, self._params.write_buffer_offset)
+
+    def _write_file_data(self, data: bytes, offset: int) -> bool:
         try:
-            next_expected_progress = offset + len(data)
-            if self.transmission_mode == TransmissionMode.ACKNOWLEDGED:
-                self._lost_segment_handling(offset, len(data))
             self.user.vfs.write_data(self._params.fp.file_name, data, offset)
-            self._params.finished_params.file_status = FileStatus.FILE_RETAINED
-
-            if (
-                self._params.fp.file_size_eof is not None
-                and (offset + len(file_data_pdu.file_data) > self._params.fp.file_size_eof)
-                and (
-                    self._declare_fault(ConditionCode.FILE_SIZE_ERROR)
-                    != FaultHandlerCode.IGNORE_ERROR
-                )
-            ):
-                # CFDP 4.6.1.2.7 c): If the sum of the FD PDU offset and segment size exceeds
-                # the file size indicated in the first previously received EOF (No Error) PDU, if
-                # any, then a File Size Error fault shall be declared.
-                return
-            # Ensure that the progress value is always incremented
-            self._params.fp.progress = max(next_expected_progress, self._params.fp.progress)
-        except FileNotFoundError:
-            if self._params.finished_params.file_status != FileStatus.FILE_RETAINED:
-                self._params.finished_params.file_status = FileStatus.DISCARDED_FILESTORE_REJECTION
-                self._declare_fault(ConditionCode.FILESTORE_REJECTION)
-        except PermissionError:
+        except (FileNotFoundError, PermissionError):
             if self._params.finished_params.file_status != FileStatus.FILE_RETAINED:
                 self._params.finished_params.file_status = FileStatus.DISCARDED_FILESTORE_REJECTION
                 self._declare_fault(ConditionCode.FILESTORE_REJECTION)
+            return False
+        self._params.finished_params.file_status = FileStatus.FILE_RETAINED
+        crc_calculator = self._params.crc_calculator
+        if crc_calculator is not None:
+            if offset == self._params.crc_progress:
+                crc_calculator.update(data)
+                self._params.crc_progress += len(data)
+            else:
+                # Gaps or re-written data need to be checked with the file content.
+                self._params.crc_calculator = None
+        return True
 
     def _handle_transfer_completion(self) -> None:
         self._notice_of_completion()
@@ -867,97 +1032,89 @@ class DestHandler:
     def _lost_segment_handling(self, offset: int, data_len: int) -> None:
         """Lost segment detection: 4.6.4.3.1 a) and b) are covered by this code. c) is covered
         by dedicated code which is run when the EOF PDU is handled."""
-        if offset > self._params.acked_params.last_end_offset:
-            lost_segment = (self._params.acked_params.last_end_offset, offset)
-            self._params.acked_params.lost_seg_tracker.add_lost_segment(
-                (self._params.acked_params.last_end_offset, offset)
-            )
+        acked_params = self._params.acked_params
+        end_offset = offset + data_len
+        if offset > acked_params.last_end_offset:
+            lost_segment = (acked_params.last_end_offset, offset)
+            acked_params.lost_seg_tracker.add_lost_segment(lost_segment)
             assert self._params.remote_cfg is not None
             if self._params.remote_cfg.immediate_nak_mode:
                 self._add_packet_to_be_sent(
                     NakPdu(
                         self._params.pdu_conf,
                         0,
-                        offset + data_len,
+                        end_offset,
                         segment_requests=[lost_segment],
                     )
                 )
-        if offset >= self._params.acked_params.last_end_offset:
-            self._params.acked_params.last_start_offset = offset
-            self._params.acked_params.last_end_offset = offset + data_len
-        if offset + data_len <= self._params.acked_params.last_start_offset:
+        if offset >= acked_params.last_end_offset:
+            acked_params.last_start_offset = offset
+            acked_params.last_end_offset = end_offset
+        if end_offset <= acked_params.last_start_offset:
             # Might be a re-requested FD PDU.
-            self._params.acked_params.lost_seg_tracker.remove_lost_segment(
-                (offset, offset + data_len)
-            )
+            acked_params.lost_seg_tracker.remove_lost_segment((offset, end_offset))
 
     def _deferred_lost_segment_handling(self) -> None:
-        if not self._params.acked_params.deferred_lost_segment_detection_active:
+        acked_params = self._params.acked_params
+        if not acked_params.deferred_lost_segment_detection_active:
             return
-        assert self._params.remote_cfg is not None
+        remote_cfg = self._params.remote_cfg
+        assert remote_cfg is not None
         assert self._params.fp.file_size_eof is not None
         if (
-            self._params.acked_params.lost_seg_tracker.num_lost_segments == 0
-            and not self._params.acked_params.metadata_missing
+            acked_params.lost_seg_tracker.num_lost_segments == 0
+            and not acked_params.metadata_missing
         ):
             # We are done and have received everything.
             self._checksum_verify()
             self.states.step = TransactionStep.TRANSFER_COMPLETION
-            self._params.acked_params.deferred_lost_segment_detection_active = False
+            acked_params.deferred_lost_segment_detection_active = False
             return
         first_nak_issuance = False
         # This is the case if this is the first issuance of NAK PDUs
         # A timer needs to be instantiated, but we do not increment the activity counter yet.
-        if self._params.acked_params.procedure_timer is None:
-            self._params.acked_params.procedure_timer = Countdown.from_seconds(
-                self._params.remote_cfg.nak_timer_interval_seconds
+        if acked_params.procedure_timer is None:
+            acked_params.procedure_timer = Countdown.from_seconds(
+                remote_cfg.nak_timer_interval_seconds
             )
             first_nak_issuance = True
-        elif self._params.acked_params.procedure_timer.busy():
+        elif acked_params.procedure_timer.busy():
             # There were or there was a previous NAK sequence(s). Wait for timeout before issuing
             # a new NAK sequence.
             return
         if (
             not first_nak_issuance
-            and self._params.acked_params.nak_activity_counter + 1
-            == self._params.remote_cfg.nak_timer_expiration_limit
+            and acked_params.nak_activity_counter + 1 == remote_cfg.nak_timer_expiration_limit
         ):
             self._declare_fault(ConditionCode.NAK_LIMIT_REACHED)
             return
         # This is not the first NAK issuance and the timer expired.
-        max_segments_in_one_pdu = get_max_seg_reqs_for_max_packet_size_and_pdu_cfg(
-            self._params.remote_cfg.max_packet_len, self._params.pdu_conf
-        )
-        next_segment_reqs = []
-        if self._params.acked_params.metadata_missing:
-            next_segment_reqs.append((0, 0))
-        for (
-            start,
-            end,
-        ) in self._params.acked_params.lost_seg_tracker.lost_segments.items():
-            next_segment_reqs.append((start, end))
-            if len(next_segment_reqs) == max_segments_in_one_pdu:
-                self._add_packet_to_be_sent(
-                    NakPdu(
-                        self._params.pdu_conf,
-                        0,
-                        self._params.fp.file_size_eof,
-                        next_segment_reqs,
-                    )
-                )
-                next_segment_reqs = []
-        if len(next_segment_reqs) > 0:
+        max_segments_in_one_pdu = acked_params.max_segments_in_one_pdu
+        if max_segments_in_one_pdu is None:
+            # Every NAK PDU contains a slice of the segment requests, so no PDU can exceed the
+            # maximum packet length.
+            max_segments_in_one_pdu = max(
+                get_max_seg_reqs_for_max_packet_size_and_pdu_cfg(
+                    remote_cfg.max_packet_len, self._params.pdu_conf
+                ),
+                1,
+            )
+            acked_params.max_segments_in_one_pdu = max_segments_in_one_pdu
+        segment_reqs = acked_params.lost_seg_tracker.segment_requests()
+        if acked_params.metadata_missing:
+            segment_reqs.insert(0, (0, 0))
+        for slice_start in range(0, len(segment_reqs), max_segments_in_one_pdu):
             self._add_packet_to_be_sent(
                 NakPdu(
                     self._params.pdu_conf,
                     0,
                     self._params.fp.file_size_eof,
-                    next_segment_reqs,
+                    segment_reqs[slice_start : slice_start + max_segments_in_one_pdu],
                 )
             )
         if not first_nak_issuance:
-            self._params.acked_params.nak_activity_counter += 1
-            self._params.acked_params.procedure_timer.reset()
+            acked_params.nak_activity_counter += 1
+            acked_params.procedure_timer.reset()
 
     def _handle_eof_pdu(self, eof_pdu: EofPdu) -> bool | None:
         """Returns whether to exit the FSM prematurely."""
@@ -985,27 +1142,33 @@ class DestHandler:
 
     def _handle_no_error_eof(self) -> bool:
         """Returns whether the transfer can be completed regularly."""
+        fp = self._params.fp
+        transmission_mode = self._params.transmission_mode
         # CFDP 4.6.1.2.9: Declare file size error if progress exceeds file size
-        if self._params.fp.progress > self._params.fp.file_size_eof:  # type: ignore
+        if fp.progress > fp.file_size_eof:  # type: ignore
             if self._declare_fault(ConditionCode.FILE_SIZE_ERROR) != FaultHandlerCode.IGNORE_ERROR:
                 return False
         elif (
-            self._params.fp.progress < self._params.fp.file_size_eof  # type: ignore
-        ) and self.transmission_mode == TransmissionMode.ACKNOWLEDGED:
+            fp.progress < fp.file_size_eof  # type: ignore
+        ) and transmission_mode == TransmissionMode.ACKNOWLEDGED:
             # CFDP 4.6.4.3.1: The end offset of the last received file segment and the file
             # size as stated in the EOF PDU is not the same, so we need to add that segment to
             # the lost segments for the deferred lost segment detection procedure.
             self._params.acked_params.lost_seg_tracker.add_lost_segment(
-                (self._params.fp.progress, self._params.fp.file_size_eof)  # type: ignore
+                (fp.progress, fp.file_size_eof)  # type: ignore
             )
-        if self._params.fp.file_size_eof != self._params.fp.file_size:
+        if fp.file_size_eof != fp.file_size:
             # Can or should this ever happen for a No Error EOF? Treat this like a non-fatal
             # error for now.
             _LOGGER.warning("missmatch of EOF file size and Metadata File Size for success EOF")
-        if (
-            self.transmission_mode == TransmissionMode.UNACKNOWLEDGED
-            and not self._checksum_verify()
-        ):
+        if transmission_mode == TransmissionMode.UNACKNOWLEDGED and not self._checksum_verify():
+            if (
+                self.states.state == CfdpState.IDLE
+                or self._params.completion_disposition == CompletionDisposition.CANCELED
+            ):
+                # A write error of buffered file data already abandoned or cancelled the
+                # transaction.
+                return False
             if (
                 self._declare_fault(ConditionCode.FILE_CHECKSUM_FAILURE)
                 != FaultHandlerCode.IGNORE_ERROR
@@ -1036,6 +1199,10 @@ class DestHandler:
         self._add_packet_to_be_sent(ack_pdu)
 
     def _checksum_verify(self) -> bool:
+        if not self._flush_file_data():
+            # The write error was already handled, and the checksum of a file with missing data
+            # can not be verified.
+            return False
         file_delivery_complete = False
         if (
             self._params.checksum_type == ChecksumType.NULL_CHECKSUM
@@ -1043,11 +1210,15 @@ class DestHandler:
         ):
             file_delivery_complete = True
         else:
-            crc32 = self.user.vfs.calculate_checksum(
-                self._params.checksum_type,
-                self._params.fp.file_name,
-                self._params.fp.progress,
-            )
+            crc_calculator = self._params.crc_calculator
+            if crc_calculator is not None and self._params.crc_progress == self._params.fp.progress:
+                crc32 = crc_calculator.digest()
+            else:
+                crc32 = self.user.vfs.calculate_checksum(
+                    self._params.checksum_type,
+                    self._params.fp.file_name,
+                    self._params.fp.progress,
+                )
             if crc32 == self._params.fp.crc32:
                 file_delivery_complete = True
             else:
@@ -1082,6 +1253,9 @@ class DestHandler:
         self._params.current_check_count = 0
 
     def _notice_of_completion(self) -> None:
+        if not self._flush_file_data() and self.states.state == CfdpState.IDLE:
+            # The write error lead to the transaction being abandoned.
+            return
         if self._params.completion_disposition == CompletionDisposition.COMPLETED:
             # TODO: Execute any filestore requests
             pass
@@ -1123,7 +1297,6 @@ class DestHandler:
 
     def _add_packet_to_be_sent(self, packet: GenericPduPacket) -> None:
         self._pdus_to_be_sent.append(PduHolder(packet))
-        self.states._num_packets_ready += 1
 
     def _check_limit_handling(self) -> None:
         assert self._params.check_timer is not None
@@ -1,9 +1,8 @@
 from __future__ import annotations  # Python 3.9 compatibility for | syntax
 
-import enum
 import logging
 from collections import deque
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import TYPE_CHECKING
 
@@ -42,7 +41,7 @@ from spacepackets.cfdp.tlv import ProxyMessageType
 from spacepackets.countdown import Countdown
 from spacepackets.util import ByteFieldGenerator, UnsignedByteField
 
-from cfdppy.defs import CfdpState
+from cfdppy.defs import CfdpState, NamedIntEnum
 from cfdppy.exceptions import (
     InvalidDestinationId,
     InvalidNakPdu,
@@ -76,8 +75,15 @@ if TYPE_CHECKING:
 
 _LOGGER = logging.getLogger(__name__)
 
+# Directive PDUs which are only sent to the destination handler.
+_INVALID_DIRECTIVES = frozenset(
+    (DirectiveType.METADATA_PDU, DirectiveType.EOF_PDU, DirectiveType.PROMPT_PDU)
+)
+# Directive PDUs which are ignored in unacknowledged mode.
+_ACKED_MODE_DIRECTIVES = frozenset((DirectiveType.KEEP_ALIVE_PDU, DirectiveType.NAK_PDU))
+
 
-class TransactionStep(enum.Enum):
+class TransactionStep(NamedIntEnum):
     IDLE = 0
     TRANSACTION_START = 1
     # The following three are used for the Copy File Procedure
@@ -117,15 +123,17 @@ class _SourceFileParams(_FileParamsBase):
 class SourceStateWrapper:
     state: CfdpState = CfdpState.IDLE
     step: TransactionStep = TransactionStep.IDLE
-    _num_packets_ready: int = 0
+    # The queue of the handler with the PDUs to be sent, which determines the number of packets
+    # which are ready.
+    _pdus_to_be_sent: deque[PduHolder] = field(default_factory=deque, repr=False, compare=False)
 
     @property
     def num_packets_ready(self) -> int:
-        return self._num_packets_ready
+        return len(self._pdus_to_be_sent)
 
     @property
     def packets_ready(self) -> bool:
-        return self.num_packets_ready > 0
+        return len(self._pdus_to_be_sent) > 0
 
 
 class _AckedModeParams:
@@ -241,7 +249,8 @@ class SourceHandler:
         check_timer_provider: CheckTimerProvider,
         seq_num_provider: ProvidesSeqCount,
     ):
-        self.states = SourceStateWrapper()
+        self._pdus_to_be_sent: deque[PduHolder] = deque()
+        self.states = SourceStateWrapper(_pdus_to_be_sent=self._pdus_to_be_sent)
         self.cfg = cfg
         self.user = user
         self.remote_cfg_table = remote_cfg_table
@@ -249,7 +258,6 @@ class SourceHandler:
         self.check_timer_provider = check_timer_provider
         self._params = _TransferFieldWrapper(cfg.local_entity_id)
         self._put_req: PutRequest | None = None
-        self._pdus_to_be_sent: deque[PduHolder] = deque()
 
     @property
     def entity_id(self) -> UnsignedByteField:
@@ -344,7 +352,6 @@ class SourceHandler:
         if self._params.remote_cfg is None:
             raise NoRemoteEntityCfgFound(entity_id=request.destination_id)
         self._params.dest_id = request.destination_id
-        self.states._num_packets_ready = 0
         self.states.state = CfdpState.BUSY
         self._setup_transmission_params()
         if self._params.transmission_mode == TransmissionMode.UNACKNOWLEDGED:
@@ -396,23 +403,20 @@ class SourceHandler:
             raise InvalidTransactionSeqNum(
                 self._params.transaction_seq_num, packet.transaction_seq_num
             )
-        if packet.directive_type in [
-            DirectiveType.METADATA_PDU,
-            DirectiveType.EOF_PDU,
-            DirectiveType.PROMPT_PDU,
-        ]:
+        directive_type = packet.directive_type
+        if directive_type in _INVALID_DIRECTIVES:
             raise InvalidPduForSourceHandler(packet)
         if self._params.transmission_mode == TransmissionMode.UNACKNOWLEDGED and (
-            packet.directive_type in (DirectiveType.KEEP_ALIVE_PDU, DirectiveType.NAK_PDU)
+            directive_type in _ACKED_MODE_DIRECTIVES
         ):
             raise PduIgnoredForSource(
                 reason=PduIgnoredForSourceReason.ACK_MODE_PACKET_INVALID_MODE,
                 ignored_packet=packet,
             )
-        if packet.directive_type != DirectiveType.NAK_PDU:
+        if directive_type != DirectiveType.NAK_PDU:
             if (
                 self.states.step == TransactionStep.WAITING_FOR_EOF_ACK
-                and packet.directive_type != DirectiveType.ACK_PDU
+                and directive_type != DirectiveType.ACK_PDU
             ):
                 raise PduIgnoredForSource(
                     reason=PduIgnoredForSourceReason.NOT_WAITING_FOR_ACK,
@@ -420,7 +424,7 @@ class SourceHandler:
                 )
             if (
                 self.states.step == TransactionStep.WAITING_FOR_FINISHED
-                and packet.directive_type != DirectiveType.FINISHED_PDU
+                and directive_type != DirectiveType.FINISHED_PDU
             ):
                 raise PduIgnoredForSource(
                     reason=PduIgnoredForSourceReason.NOT_WAITING_FOR_FINISHED_PDU,
@@ -429,10 +433,20 @@ class SourceHandler:
 
     def get_next_packet(self) -> PduHolder | None:
         """Retrieve the next packet which should be sent to the remote CFDP destination entity."""
-        if len(self._pdus_to_be_sent) == 0:
-            return None
-        self.states._num_packets_ready -= 1
-        return self._pdus_to_be_sent.popleft()
+        if self._pdus_to_be_sent:
+            return self._pdus_to_be_sent.popleft()
+        return None
+
+    def get_next_packets(self, max_num_packets: int | None = None) -> list[PduHolder]:
+        """Retrieve the next packets which should be sent to the remote CFDP destination entity
+        with one call. All packets are retrieved if ``max_num_packets`` is None. This is
+        useful for transports which can send multiple packets at once."""
+        pdus_to_be_sent = self._pdus_to_be_sent
+        if max_num_packets is None or max_num_packets >= len(pdus_to_be_sent):
+            packets = list(pdus_to_be_sent)
+            pdus_to_be_sent.clear()
+            return packets
+        return [pdus_to_be_sent.popleft() for _ in range(max_num_packets)]
 
     def state_machine_no_packet(self) -> FsmResult:
         """Helper method to call :py:meth:`state_machine` with None as the packet argument."""
@@ -878,7 +892,6 @@ class SourceHandler:
 
     def _add_packet_to_be_sent(self, packet: GenericPduPacket) -> None:
         self._pdus_to_be_sent.append(PduHolder(packet))
-        self.states._num_packets_ready += 1
 
     def _prepare_progressing_file_data_pdu(self) -> None:
         """Prepare the next file data PDU, which also progresses the file copy operation.
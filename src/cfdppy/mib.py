@@ -162,11 +162,26 @@ class IndicationCfg:
 @dataclass
 class LocalEntityCfg:
     """This models the remote entity configuration information as specified in chapter 8.2
-    of the CFDP standard."""
+    of the CFDP standard.
+
+    Parameters
+    -----------
+
+    file_data_flush_threshold
+        If this is larger than 0, the destination handler collects the data of consecutive file
+        data PDUs and writes it to the filestore once this number of bytes is reached, when a
+        non-consecutive file data PDU is received, or before the checksum is verified and the
+        transaction is completed. Please note that the File-Segment-Recv.indication and the
+        progress then also cover data which was not written yet, and that write errors are
+        only detected when the data is written. The buffered data is discarded if the
+        transaction is abandoned or the handler is reset. The default value of 0 writes the
+        data of each file data PDU separately.
+    """
 
     local_entity_id: UnsignedByteField
     indication_cfg: IndicationCfg
     default_fault_handlers: DefaultFaultHandlerBase
+    file_data_flush_threshold: int = 0
 
 
 @dataclass
@@ -269,21 +284,21 @@ class RemoteEntityCfgTable:
     being used as a key."""
 
     def __init__(self, init_cfgs: Sequence[RemoteEntityCfg] | None = None):
-        self._remote_entity_dict = {}
+        # The raw entity ID value is used as the key, which is cheaper to hash than the
+        # unsigned byte field and does not depend on the width of the entity ID.
+        self._remote_entity_dict: dict[int, RemoteEntityCfg] = {}
         if init_cfgs is not None:
             self.add_configs(init_cfgs)
 
     def add_config(self, cfg: RemoteEntityCfg) -> bool:
-        if cfg.entity_id in self._remote_entity_dict:
+        if cfg.entity_id.value in self._remote_entity_dict:
             return False
-        self._remote_entity_dict.update({cfg.entity_id.value: cfg})
+        self._remote_entity_dict[cfg.entity_id.value] = cfg
         return True
 
     def add_configs(self, cfgs: Sequence[RemoteEntityCfg]) -> None:
         for cfg in cfgs:
-            if cfg.entity_id in self._remote_entity_dict:
-                continue
-            self._remote_entity_dict.update({cfg.entity_id.value: cfg})
+            self.add_config(cfg)
 
     def get_cfg(self, remote_entity_id: UnsignedByteField) -> RemoteEntityCfg | None:
         return self._remote_entity_dict.get(remote_entity_id.value)
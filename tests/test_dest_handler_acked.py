@@ -21,9 +21,10 @@ from spacepackets.cfdp.pdu import (
 from spacepackets.crc import mkPredefinedCrcFun
 
 from cfdppy.defs import CfdpState
-from cfdppy.handler.dest import FsmResult, TransactionStep
+from cfdppy.handler.dest import DestHandler, FsmResult, TransactionStep
 from cfdppy.user import MetadataRecvParams, TransactionFinishedParams
 
+from .common import CheckTimerProviderForTest
 from .test_dest_handler import TestDestHandlerBase
 
 
@@ -31,6 +32,19 @@ class TestDestHandlerAcked(TestDestHandlerBase):
     def setUp(self) -> None:
         self.common_setup(TransmissionMode.ACKNOWLEDGED)
 
+    def test_lost_segment_trackers_not_shared(self):
+        other_dest_handler = DestHandler(
+            self.local_cfg,
+            self.cfdp_user,
+            self.remote_cfg_table,
+            CheckTimerProviderForTest(timeout_dest_entity_ms=self.timeout_check_limit_handling_ms),
+        )
+        lost_seg_tracker = self.dest_handler._params.acked_params.lost_seg_tracker
+        other_lost_seg_tracker = other_dest_handler._params.acked_params.lost_seg_tracker
+        self.assertIsNot(lost_seg_tracker, other_lost_seg_tracker)
+        lost_seg_tracker.add_lost_segment((0, 500))
+        self.assertEqual(other_lost_seg_tracker.num_lost_segments, 0)
+
     def test_acked_empty_transfer(self):
         # Basic acknowledged empty file transfer.
         self._generic_regular_transfer_init(0)
@@ -278,6 +292,21 @@ class TestDestHandlerAcked(TestDestHandlerBase):
         self._generic_verify_transfer_completion(fsm_res, file_content)
         self._generic_insert_finished_pdu_ack(finished_pdu)
 
+    def test_get_next_packets(self):
+        self._insert_file_segment(
+            b"He",
+            0,
+            expected_packets=1,
+            check_indication=False,
+            expected_step=TransactionStep.WAITING_FOR_METADATA,
+        )
+        self.assertEqual(self.dest_handler.get_next_packets(0), [])
+        next_pdus = self.dest_handler.get_next_packets()
+        self.assertEqual(len(next_pdus), 1)
+        self.assertEqual(next_pdus[0].pdu_directive_type, DirectiveType.NAK_PDU)
+        self.assertFalse(self.dest_handler.packets_ready)
+        self.assertEqual(self.dest_handler.get_next_packets(), [])
+
     def test_missing_metadata_pdu(self):
         file_content = b"Hello World!"
         with open(self.src_file_path, "wb") as of:
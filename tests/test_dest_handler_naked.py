@@ -2,6 +2,7 @@ import random
 import struct
 import time
 from typing import cast
+from unittest.mock import patch
 
 from crcmod.predefined import mkPredefinedCrcFun
 from spacepackets.cfdp import (
@@ -105,6 +106,79 @@ class TestCfdpDestHandler(TestDestHandlerBase):
         self.closure_requested = True
         self._generic_larger_file_reception_test()
 
+    def _generic_file_data_writes_test(self, expected_num_of_writes: int):
+        file_info = self._random_data_two_file_segments()
+        self._generic_regular_transfer_init(file_size=file_info.file_size)
+        with patch.object(
+            self.cfdp_user.vfs, "write_data", wraps=self.cfdp_user.vfs.write_data
+        ) as write_data:
+            self._insert_file_segment(file_info.rand_data[0 : self.file_segment_len], 0)
+            self._insert_file_segment(
+                file_info.rand_data[self.file_segment_len :], offset=self.file_segment_len
+            )
+            fsm_res = self._generic_insert_eof_pdu(file_info.file_size, file_info.crc32)
+        self.assertEqual(write_data.call_count, expected_num_of_writes)
+        self._generic_verify_transfer_completion(fsm_res, file_info.rand_data)
+
+    def test_consecutive_file_data_is_written_once(self):
+        self.local_cfg.file_data_flush_threshold = 64 * 1024
+        self._generic_file_data_writes_test(1)
+
+    def test_file_data_written_without_buffering(self):
+        self._generic_file_data_writes_test(2)
+
+    def test_checksum_not_verified_after_failed_file_data_write(self):
+        self.local_cfg.file_data_flush_threshold = 64 * 1024
+        file_info = self._random_data_two_file_segments()
+        self._generic_regular_transfer_init(file_size=file_info.file_size)
+        self._insert_file_segment(file_info.rand_data, 0)
+        eof_pdu = EofPdu(
+            file_size=file_info.file_size, file_checksum=file_info.crc32, pdu_conf=self.src_pdu_conf
+        )
+        vfs = self.cfdp_user.vfs
+        write_patch = patch.object(vfs, "write_data", side_effect=PermissionError)
+        with write_patch, patch.object(vfs, "calculate_checksum") as calculate_checksum:
+            fsm_res = self.dest_handler.state_machine(eof_pdu)
+        calculate_checksum.assert_not_called()
+        self._state_checker(
+            fsm_res,
+            0,
+            CfdpState.BUSY,
+            TransactionStep.RECV_FILE_DATA_WITH_CHECK_LIMIT_HANDLING,
+        )
+
+    def test_checksum_calculated_from_received_file_data(self):
+        file_info = self._random_data_two_file_segments()
+        self._generic_regular_transfer_init(file_size=file_info.file_size)
+        with patch.object(
+            self.cfdp_user.vfs, "calculate_checksum", wraps=self.cfdp_user.vfs.calculate_checksum
+        ) as calculate_checksum:
+            self._insert_file_segment(file_info.rand_data[0 : self.file_segment_len], 0)
+            self._insert_file_segment(
+                file_info.rand_data[self.file_segment_len :], offset=self.file_segment_len
+            )
+            fsm_res = self._generic_insert_eof_pdu(file_info.file_size, file_info.crc32)
+        calculate_checksum.assert_not_called()
+        self._generic_verify_transfer_completion(fsm_res, file_info.rand_data)
+
+    def test_checksum_calculated_from_file_for_reordered_file_data(self):
+        file_info = self._random_data_two_file_segments()
+        self._generic_regular_transfer_init(file_size=file_info.file_size)
+        with patch.object(
+            self.cfdp_user.vfs, "calculate_checksum", wraps=self.cfdp_user.vfs.calculate_checksum
+        ) as calculate_checksum:
+            self._insert_file_segment(
+                file_info.rand_data[self.file_segment_len :], offset=self.file_segment_len
+            )
+            self._insert_file_segment(
+                file_info.rand_data[0 : self.file_segment_len],
+                0,
+                expected_progress=file_info.file_size,
+            )
+            fsm_res = self._generic_insert_eof_pdu(file_info.file_size, file_info.crc32)
+        calculate_checksum.assert_called_once()
+        self._generic_verify_transfer_completion(fsm_res, file_info.rand_data)
+
     def test_remote_cfg_does_not_exist(self):
         # Re-create empty table
         self.remote_cfg_table = RemoteEntityCfgTable()
@@ -1,13 +1,17 @@
+import errno
 import os.path
 import shutil
 import struct
 import tempfile
 from pathlib import Path
 from unittest import TestCase
+from unittest.mock import patch
 
+from crcmod.predefined import PredefinedCrc
 from spacepackets.cfdp import ChecksumType
 
 from cfdppy.crc import calc_modular_checksum
+from cfdppy.exceptions import ChecksumNotImplemented
 from cfdppy.filestore import FilestoreResult, NativeFilestore
 
 EXAMPLE_DATA_CFDP = bytes(
@@ -80,6 +84,15 @@ class TestCfdpHostFilestore(TestCase):
         res = self.filestore.delete_file(self.test_file_name_0)
         self.assertTrue(res == FilestoreResult.DELETE_FILE_DOES_NOT_EXIST)
 
+    def test_creation_in_new_folder(self):
+        file_in_new_folder = self.test_dir_name_0.joinpath("subfolder", "file.txt")
+        res = self.filestore.create_file(file_in_new_folder)
+        self.assertEqual(res, FilestoreResult.CREATE_SUCCESS)
+        self.assertTrue(file_in_new_folder.is_file())
+        self.assertEqual(
+            self.filestore.create_file(self.test_dir_name_0), FilestoreResult.CREATE_NOT_ALLOWED
+        )
+
     def test_rename(self):
         self.filestore.create_file(self.test_file_name_0)
         res = self.filestore.rename_file(self.test_file_name_0, self.test_file_name_1)
@@ -89,6 +102,25 @@ class TestCfdpHostFilestore(TestCase):
         res = self.filestore.delete_file(self.test_file_name_1)
         self.assertTrue(res == FilestoreResult.DELETE_SUCCESS)
 
+    def test_rename_across_file_systems(self):
+        self.filestore.create_file(self.test_file_name_0)
+        self.filestore.write_data(self.test_file_name_0, b"Hello World", 0)
+        with patch("os.rename", side_effect=OSError(errno.EXDEV, "Cross-device link")):
+            res = self.filestore.rename_file(self.test_file_name_0, self.test_file_name_1)
+        self.assertEqual(res, FilestoreResult.RENAME_SUCCESS)
+        self.assertFalse(self.test_file_name_0.exists())
+        self.assertEqual(self.test_file_name_1.read_bytes(), b"Hello World")
+
+    def test_replace_across_file_systems(self):
+        self.filestore.create_file(self.test_file_name_0)
+        self.filestore.write_data(self.test_file_name_0, b"Hello World", 0)
+        self.filestore.create_file(self.test_file_name_1)
+        with patch("os.replace", side_effect=OSError(errno.EXDEV, "Cross-device link")):
+            res = self.filestore.replace_file(self.test_file_name_1, self.test_file_name_0)
+        self.assertEqual(res, FilestoreResult.REPLACE_SUCCESS)
+        self.assertFalse(self.test_file_name_0.exists())
+        self.assertEqual(self.test_file_name_1.read_bytes(), b"Hello World")
+
     def test_create_dir(self):
         res = self.filestore.create_directory(self.test_file_name_0)
         self.assertTrue(res == FilestoreResult.CREATE_DIR_SUCCESS)
@@ -108,6 +140,27 @@ class TestCfdpHostFilestore(TestCase):
         data = self.filestore.read_data(self.test_file_name_0, 0)
         self.assertEqual(data, file_data)
 
+    def test_missing_file(self):
+        with self.assertRaises(FileNotFoundError):
+            self.filestore.read_data(self.test_file_name_0, 0)
+        with self.assertRaises(FileNotFoundError):
+            self.filestore.file_size(self.test_file_name_0)
+        with self.assertRaises(FileNotFoundError):
+            self.filestore.write_data(self.test_file_name_0, b"Hello World", 0)
+        with self.assertRaises(FileNotFoundError):
+            self.filestore.truncate_file(self.test_file_name_0)
+        self.assertFalse(self.test_file_name_0.exists())
+        self.assertEqual(
+            self.filestore.delete_file(self.test_file_name_0),
+            FilestoreResult.DELETE_FILE_DOES_NOT_EXIST,
+        )
+
+    def test_truncate_file(self):
+        with open(self.test_file_name_0, "wb") as of:
+            of.write(b"Hello World")
+        self.filestore.truncate_file(self.test_file_name_0)
+        self.assertEqual(self.filestore.file_size(self.test_file_name_0), 0)
+
     def test_read_opened_file(self):
         file_data = b"Hello World"
         with open(self.test_file_name_0, "wb") as of:
@@ -116,6 +169,15 @@ class TestCfdpHostFilestore(TestCase):
             data = self.filestore.read_from_opened_file(rf, 0, len(file_data))
             self.assertEqual(data, file_data)
 
+    def test_read_into_opened_file(self):
+        file_data = b"Hello World"
+        with open(self.test_file_name_0, "wb") as of:
+            of.write(file_data)
+        buffer = bytearray(8)
+        with open(self.test_file_name_0, "rb") as rf:
+            self.assertEqual(self.filestore.read_into_opened_file(rf, 6, buffer), 5)
+        self.assertEqual(buffer[:5], b"World")
+
     def test_write_file(self):
         file_data = b"Hello World"
         self.filestore.create_file(self.test_file_name_0)
@@ -141,9 +203,107 @@ class TestCfdpHostFilestore(TestCase):
         res = filestore.list_directory(dir_name=tempdir, target_file=self.test_list_dir_name)
         self.assertTrue(res == FilestoreResult.SUCCESS)
 
+    def test_list_dir_recursive(self):
+        self.filestore.create_directory(self.test_dir_name_0)
+        self.filestore.create_file(self.test_dir_name_0.joinpath("file.txt"))
+        self.filestore.write_data(self.test_dir_name_0.joinpath("file.txt"), b"Hello World", 0)
+        res = self.filestore.list_directory(
+            dir_name=self.test_dir_name_0.parent,
+            target_file=self.test_list_dir_name,
+            recursive=True,
+        )
+        self.assertEqual(res, FilestoreResult.SUCCESS)
+        with open(self.test_list_dir_name) as listing:
+            lines = listing.read().splitlines()
+        self.assertEqual(lines[0], f"Contents of directory {self.test_dir_name_0.parent}:")
+        self.assertTrue(any(line.endswith(f" {self.test_dir_name_0.name}") for line in lines))
+        file_line = next(line for line in lines if line.endswith("/file.txt"))
+        self.assertTrue(file_line.startswith("-"))
+        self.assertIn(" 11 ", file_line)
+        self.assertTrue(file_line.endswith(f" {self.test_dir_name_0.name}/file.txt"))
+
     def test_modular_checksum(self):
         self.assertEqual(calc_modular_checksum(self.file_path), self.expected_checksum_for_example)
 
+    def test_modular_checksum_empty_file(self):
+        self.filestore.create_file(self.test_file_name_0)
+        self.assertEqual(calc_modular_checksum(self.test_file_name_0), bytes(4))
+
+    def test_modular_checksum_multiple_blocks(self):
+        data = bytes(range(255, 0, -1)) * 3
+        with open(self.test_file_name_0, "wb") as file:
+            file.write(data)
+        padded_data = data.ljust(len(data) + (-len(data) % 4), b"\0")
+        full_sum = sum(word for (word,) in struct.iter_unpack("!I", padded_data)) % 2**32
+        # Blocks which do not end on a word boundary are handled as well.
+        for block_size in (7, 8):
+            with patch("cfdppy.crc._BLOCK_SIZE", block_size):
+                self.assertEqual(
+                    calc_modular_checksum(self.test_file_name_0), struct.pack("!I", full_sum)
+                )
+
+    def test_crc_checksums(self):
+        data = bytes(range(256)) * 40
+        with open(self.test_file_name_0, "wb") as of:
+            of.write(data)
+        for checksum_type, crcmod_name in (
+            (ChecksumType.CRC_32, "crc32"),
+            (ChecksumType.CRC_32C, "crc32c"),
+        ):
+            crc = PredefinedCrc(crcmod_name)
+            crc.update(data[:9000])
+            self.assertEqual(
+                self.filestore.calculate_checksum(checksum_type, self.test_file_name_0, 9000),
+                crc.digest(),
+            )
+
+    def test_verify_checksum(self):
+        self.assertTrue(
+            self.filestore.verify_checksum(
+                self.expected_checksum_for_example,
+                ChecksumType.MODULAR,
+                self.file_path,
+                len(EXAMPLE_DATA_CFDP),
+            )
+        )
+        self.assertFalse(
+            self.filestore.verify_checksum(
+                bytes(4), ChecksumType.MODULAR, self.file_path, len(EXAMPLE_DATA_CFDP)
+            )
+        )
+        # The null checksum is not verified, so the file is not accessed.
+        self.assertTrue(
+            self.filestore.verify_checksum(
+                bytes(4), ChecksumType.NULL_CHECKSUM, self.test_file_name_0, 10
+            )
+        )
+
+    def test_unsupported_checksum(self):
+        with self.assertRaises(ChecksumNotImplemented):
+            self.filestore.calculate_checksum(ChecksumType.CRC_32_PROXIMITY_1, self.file_path, 10)
+
+    def test_crc_checksum_without_mmap(self):
+        data = bytes(range(256)) * 40
+        with open(self.test_file_name_0, "wb") as of:
+            of.write(data)
+        crc = PredefinedCrc("crc32c")
+        crc.update(data)
+        with patch("cfdppy.filestore.mmap.mmap", side_effect=OSError):
+            self.assertEqual(
+                self.filestore.calculate_checksum(
+                    ChecksumType.CRC_32C, self.test_file_name_0, len(data) + 100, 1000
+                ),
+                crc.digest(),
+            )
+
+    def test_crc_checksum_empty_file(self):
+        with open(self.test_file_name_0, "wb"):
+            pass
+        self.assertEqual(
+            self.filestore.calculate_checksum(ChecksumType.CRC_32, self.test_file_name_0, 10),
+            bytes(4),
+        )
+
     def test_zero_length_checksum(self):
         with self.assertRaises(ValueError):
             self.filestore.calculate_checksum(
@@ -13,6 +13,12 @@ class TestLostSegmentTracker(TestCase):
         seg_end = self.tracker.lost_segments[0]
         self.assertEqual(seg_end, 500)
 
+    def test_segment_requests(self):
+        self.assertEqual(self.tracker.segment_requests(), [])
+        self.tracker.add_lost_segment((1100, 1200))
+        self.tracker.add_lost_segment((500, 1000))
+        self.assertEqual(self.tracker.segment_requests(), [(500, 1000), (1100, 1200)])
+
     def test_coalesence_0(self):
         self.tracker.add_lost_segment((500, 1000))
         self.tracker.add_lost_segment((1000, 1500))
@@ -37,6 +43,17 @@ class TestLostSegmentTracker(TestCase):
         self.assertEqual(len(self.tracker.lost_segments), 2)
         self.assertEqual(self.tracker.lost_segments, {500: 1000, 1100: 1200})
 
+    def test_coalesence_overlapping(self):
+        self.tracker.add_lost_segment((1100, 1200))
+        self.tracker.add_lost_segment((500, 1000))
+        self.tracker.add_lost_segment((800, 900))
+        self.tracker.add_lost_segment((1150, 1300))
+        self.tracker.add_lost_segment((1300, 1400))
+        self.tracker.add_lost_segment((2000, 2100))
+        self.tracker.coalesce_lost_segments()
+        self.assertEqual(self.tracker.num_lost_segments, 3)
+        self.assertEqual(self.tracker.lost_segments, {500: 1000, 1100: 1400, 2000: 2100})
+
     def test_removal_0(self):
         self.tracker.add_lost_segment((0, 500))
         self.assertTrue(self.tracker.remove_lost_segment((0, 500)))
@@ -57,6 +74,13 @@ class TestLostSegmentTracker(TestCase):
         self.assertTrue(self.tracker.remove_lost_segment((300, 400)))
         self.assertEqual(self.tracker.lost_segments, {0: 300, 400: 500})
 
+    def test_removal_rest_starts_at_existing_segment(self):
+        self.tracker.add_lost_segment((0, 1000))
+        self.tracker.add_lost_segment((600, 700))
+        self.assertTrue(self.tracker.remove_lost_segment((100, 600)))
+        self.assertEqual(self.tracker.num_lost_segments, 2)
+        self.assertEqual(self.tracker.segment_requests(), [(0, 100), (600, 1000)])
+
     def test_noop_removal_0(self):
         self.tracker.add_lost_segment((0, 500))
         self.assertFalse(self.tracker.remove_lost_segment((500, 1000)))
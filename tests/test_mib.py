@@ -0,0 +1,41 @@
+from dataclasses import replace
+from unittest import TestCase
+
+from spacepackets.cfdp import ChecksumType, TransmissionMode
+from spacepackets.util import ByteFieldU8, ByteFieldU16
+
+from cfdppy.mib import RemoteEntityCfg, RemoteEntityCfgTable
+
+
+class TestRemoteEntityCfgTable(TestCase):
+    def setUp(self):
+        self.remote_cfg = RemoteEntityCfg(
+            entity_id=ByteFieldU16(2),
+            max_packet_len=512,
+            max_file_segment_len=256,
+            closure_requested=False,
+            crc_on_transmission=False,
+            default_transmission_mode=TransmissionMode.UNACKNOWLEDGED,
+            crc_type=ChecksumType.CRC_32,
+        )
+        self.table = RemoteEntityCfgTable()
+
+    def test_get_cfg(self):
+        self.assertTrue(self.table.add_config(self.remote_cfg))
+        self.assertIs(self.table.get_cfg(ByteFieldU16(2)), self.remote_cfg)
+        # Only the entity ID value is relevant for the lookup.
+        self.assertIs(self.table.get_cfg(ByteFieldU8(2)), self.remote_cfg)
+        self.assertIsNone(self.table.get_cfg(ByteFieldU16(3)))
+
+    def test_duplicate_cfg(self):
+        self.assertTrue(self.table.add_config(self.remote_cfg))
+        other_cfg = replace(self.remote_cfg, max_packet_len=1024)
+        self.assertFalse(self.table.add_config(other_cfg))
+        self.assertIs(self.table.get_cfg(ByteFieldU16(2)), self.remote_cfg)
+
+    def test_add_configs(self):
+        other_cfg = replace(self.remote_cfg, entity_id=ByteFieldU16(3))
+        duplicate_cfg = replace(self.remote_cfg, max_packet_len=1024)
+        table = RemoteEntityCfgTable([self.remote_cfg, other_cfg, duplicate_cfg])
+        self.assertIs(table.get_cfg(ByteFieldU16(2)), self.remote_cfg)
+        self.assertIs(table.get_cfg(ByteFieldU16(3)), other_cfg)
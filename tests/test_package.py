@@ -0,0 +1,28 @@
+from unittest import TestCase
+
+import cfdppy
+from cfdppy import CfdpState
+from cfdppy.filestore import HostFilestore
+from cfdppy.handler.dest import DestHandler, TransactionStep
+
+
+class TestPackage(TestCase):
+    def test_lazy_members(self):
+        self.assertIs(cfdppy.HostFilestore, HostFilestore)
+        with self.assertRaises(AttributeError):
+            _ = cfdppy.NotAMember
+
+    def test_submodules_are_attributes(self):
+        self.assertIs(cfdppy.handler.DestHandler, DestHandler)
+        for name in ("filestore", "handler", "restricted_filestore", "user"):
+            self.assertTrue(hasattr(cfdppy, name))
+
+    def test_dir_lists_all_members(self):
+        members = dir(cfdppy)
+        for name in cfdppy.__all__:
+            self.assertIn(name, members)
+
+    def test_state_enum_formatting(self):
+        self.assertEqual(str(CfdpState.BUSY), "CfdpState.BUSY")
+        self.assertEqual(f"{TransactionStep.IDLE}", "TransactionStep.IDLE")
+        self.assertEqual(CfdpState.BUSY, 1)